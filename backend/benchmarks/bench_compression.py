@@ -0,0 +1,108 @@
+"""Bytes saved versus CPU time for response and stream compression.
+
+Run from the backend folder:
+
+    uv run python -m benchmarks.bench_compression
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from benchmarks.bench_json import make_note, make_payloads
+from src.compression import StreamCompressor, brotli, compress_body
+from src.logic.json_codec import dumps
+from src.v1.responses import encode_sse_frame
+from src.v1.schema import AITutorStreamMessage
+
+REPEATS = 5
+
+
+def best_time(function: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def make_chat_stream() -> List[bytes]:
+    # A long answer streamed as small incremental frames
+    answer = make_note(20_000)
+    frames = [
+        encode_sse_frame(
+            AITutorStreamMessage(type="step", content="Searching...", thread_id="t")
+        )
+    ]
+    for start in range(0, len(answer), 40):
+        frames.append(
+            encode_sse_frame(
+                AITutorStreamMessage(
+                    type="final",
+                    content=answer[start : start + 40],
+                    timestamp=datetime.now(),
+                    thread_id="thread-1234",
+                )
+            )
+        )
+    return frames
+
+
+def report(label: str, original: int, compressed: int, seconds: float) -> None:
+    print(
+        f"{label:<34} {original / 1024:9.1f} KiB -> {compressed / 1024:8.1f} KiB"
+        f"  saved {100 * (1 - compressed / original):5.1f}%"
+        f"  cpu {seconds * 1e3:8.2f} ms"
+    )
+
+
+def main() -> None:
+    file_payload, listing_payload = make_payloads()
+    bodies = {
+        "FileContentResponse (1 MB)": dumps(file_payload),
+        "Project listing (500x200)": dumps(listing_payload),
+    }
+    codecs = [("gzip", 1, 0), ("gzip", 6, 0)]
+    if brotli is not None:
+        codecs += [("br", 0, 4), ("br", 0, 11)]
+
+    for label, body in bodies.items():
+        for encoding, gzip_level, brotli_quality in codecs:
+            compressed = compress_body(body, encoding, gzip_level, brotli_quality)
+            seconds = best_time(
+                lambda: compress_body(body, encoding, gzip_level, brotli_quality)
+            )
+            level = gzip_level if encoding == "gzip" else brotli_quality
+            report(f"{label} {encoding}-{level}", len(body), len(compressed), seconds)
+
+    frames = make_chat_stream()
+    original = sum(len(frame) for frame in frames)
+    print(f"\nChat stream: {len(frames)} frames")
+    for encoding, gzip_level, brotli_quality in codecs[:3]:
+
+        def compress_stream() -> int:
+            compressor = StreamCompressor(encoding, gzip_level, brotli_quality)
+            size = sum(len(compressor.compress(frame)) for frame in frames)
+            return size + len(compressor.finish())
+
+        level = gzip_level if encoding == "gzip" else brotli_quality
+        report(
+            f"flushed per frame {encoding}-{level}",
+            original,
+            compress_stream(),
+            best_time(compress_stream),
+        )
+
+    # What buffering the whole stream would achieve, for comparison
+    buffered = compress_body(b"".join(frames), "gzip", 6, 0)
+    report(
+        "buffered whole stream gzip-6",
+        original,
+        len(buffered),
+        best_time(lambda: compress_body(b"".join(frames), "gzip", 6, 0)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare the default JSON encoding paths against the fast codec layer.
+
+Run from the backend folder:
+
+    uv run python -m benchmarks.bench_json
+"""
+
+import random
+import string
+import timeit
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+
+from src.logic.json_codec import JSON_BACKEND
+from src.v1.responses import FastJSONResponse, encode_sse_frame
+from src.v1.schema import AITutorStreamMessage, FileContentResponse, ProjectResponse
+
+REPEATS = 5
+
+
+def make_note(size: int) -> str:
+    words = ["".join(random.choices(string.ascii_lowercase, k=7)) for _ in range(500)]
+    words += ["naïve", "café", "Ωmega", "→", '"quoted"', "tab\tbed"]
+    lines = []
+    while sum(len(line) for line in lines) < size:
+        lines.append(" ".join(random.choices(words, k=12)))
+    return "\n".join(lines)
+
+
+def make_payloads():
+    file_payload = FileContentResponse(
+        name="lecture-notes",
+        path="physics/lecture-notes.md",
+        content=make_note(1_000_000),
+        modified=datetime.now(),
+        size=1_000_000,
+    ).model_dump(mode="json")
+
+    listing_payload = [
+        ProjectResponse(
+            id=f"project-{i}",
+            name=f"Project {i}",
+            path=f"project-{i}",
+            file_names=[f"note-{j}" for j in range(200)],
+            created=datetime.now(),
+            modified=datetime.now(),
+        ).model_dump(mode="json")
+        for i in range(500)
+    ]
+    return file_payload, listing_payload
+
+
+def bench(label: str, baseline, candidate, number: int) -> None:
+    baseline_time = min(timeit.repeat(baseline, number=number, repeat=REPEATS))
+    candidate_time = min(timeit.repeat(candidate, number=number, repeat=REPEATS))
+    print(
+        f"{label:<28} default {baseline_time / number * 1e3:8.3f} ms"
+        f"   fast {candidate_time / number * 1e3:8.3f} ms"
+        f"   x{baseline_time / candidate_time:5.1f}"
+    )
+
+
+def main() -> None:
+    random.seed(0)
+    file_payload, listing_payload = make_payloads()
+    # Response bodies are rendered from the already validated payload, the
+    # same point FastAPI hands content to the response class
+    default_render = JSONResponse.render
+    fast_render = FastJSONResponse.render
+    response = JSONResponse.__new__(JSONResponse)
+
+    print(f"JSON backend: {JSON_BACKEND}")
+    bench(
+        "FileContentResponse (1 MB)",
+        lambda: default_render(response, file_payload),
+        lambda: fast_render(response, file_payload),
+        number=20,
+    )
+    bench(
+        "Project listing (500x200)",
+        lambda: default_render(response, listing_payload),
+        lambda: fast_render(response, listing_payload),
+        number=20,
+    )
+
+    message = AITutorStreamMessage(
+        type="final", content=make_note(4_000), thread_id="thread"
+    )
+    bench(
+        "SSE frame (4 KB)",
+        lambda: f"data: {message.model_dump_json()}\n\n".encode("utf-8"),
+        lambda: encode_sse_frame(message),
+        number=2_000,
+    )
+
+
+if __name__ == "__main__":
+    main()
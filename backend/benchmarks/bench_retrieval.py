@@ -0,0 +1,256 @@
+"""Retrieval quality versus cost for every note retrieval strategy.
+
+Runs a labeled set of questions over a fixture workspace and reports
+recall@k, MRR, the tokens each strategy would put in the prompt and its
+latency percentiles. The search terms stand in for what query analysis
+would extract from the question. The workspace is padded with filler notes
+so the latencies mean something.
+
+Run from the backend folder:
+
+    uv run python -m benchmarks.bench_retrieval
+"""
+
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from src.logic.ai_tutor.nodes.retrieval.note_search import (
+    CANDIDATE_FILES,
+    TOP_K_FILES,
+    find_relevant_files,
+    format_found_files,
+    to_found_file_entry,
+)
+from src.logic.search.diversify import select_diverse
+from src.logic.search.indexer import indexing_service
+from src.logic.search.scanner import list_note_paths, scan_project
+from src.logic.search.sharded import merge_shard_results, search_projects
+from src.logic.search.tokenizer import read_note_text
+from src.logic.search.trigram import TrigramIndex
+from src.settings import settings
+
+FILLER_NOTES = 1_000
+REPEATS = 10
+K_VALUES = (1, 3, 5)
+# Rough prompt token estimate; close enough to compare strategies
+CHARS_PER_TOKEN = 4
+
+FIXTURE_NOTES = {
+    "biology": {
+        "Photosynthesis": "Plants turn light into chemical energy inside the [[Chloroplast]]. The light reactions split water and release oxygen; the [[Calvin cycle]] then fixes carbon dioxide into sugar.",
+        "Photosynthesis (copy)": "Plants turn light into chemical energy inside the [[Chloroplast]]. The light reactions split water and release oxygen; the [[Calvin cycle]] then fixes carbon dioxide into sugars.",
+        "Chloroplast": "Organelle with stacked thylakoid membranes holding chlorophyll. It has its own DNA, like the [[Mitochondria]].",
+        "Calvin cycle": "Light-independent reactions in the stroma. The enzyme RuBisCO fixes carbon dioxide onto ribulose bisphosphate; ATP and NADPH from the light reactions drive it.",
+        "Mitochondria": "Powerhouse of the cell. [[Cellular respiration]] happens here: the electron transport chain pumps protons and ATP synthase makes ATP.",
+        "Cellular respiration": "Glycolysis, the Krebs cycle and oxidative phosphorylation break glucose down, releasing carbon dioxide and storing the energy as ATP.",
+        "Enzymes": "Proteins that lower activation energy. Temperature and pH change their shape; a denatured enzyme loses its active site.",
+        "DNA replication": "Helicase unwinds the double helix and DNA polymerase builds the new strand from the 5' to the 3' end; Okazaki fragments form on the lagging strand.",
+        "Exam schedule": "The biology midterm covers photosynthesis, respiration, enzymes and DNA replication. Bring a calculator for the energy and ATP questions.",
+    },
+    "physics": {
+        "Thermodynamics": "The first law conserves energy; the second law says the [[Entropy]] of an isolated system never decreases. A [[Carnot engine]] sets the upper bound on efficiency.",
+        "Entropy": "A measure of the number of microstates, S = k ln W. Heat flowing from hot to cold raises the total entropy.",
+        "Carnot engine": "An idealised reversible cycle between two reservoirs. Its efficiency is 1 - Tc/Th, so no engine can convert all heat into work.",
+        "Newton's laws": "Inertia, F = ma, and equal and opposite reactions. Momentum is conserved when no external force acts.",
+        "Electromagnetism": "Maxwell's equations tie electric and magnetic fields together; a changing magnetic flux induces a voltage ([[Faraday's law]]).",
+        "Faraday's law": "The induced electromotive force equals the rate of change of magnetic flux through a loop. Lenz's law gives the sign.",
+        "Quantum basics": "Photons carry energy E = hf. The photoelectric effect showed that light arrives in quanta.",
+        "Lab report": "Measured the efficiency of a toy engine and the energy lost as heat. Entropy and the second law came up in the discussion.",
+    },
+}
+FILLER_WORDS = [
+    "lecture", "summary", "review", "example", "question", "answer", "chapter",
+    "figure", "table", "method", "result", "sample", "model", "system", "energy",
+    "cycle", "process", "structure", "function", "change", "rate", "level",
+]  # fmt: skip
+
+# (question, search terms, scope, relevant notes as "project/file")
+LABELED_QUESTIONS = [
+    ("How do plants make sugar from light?", "photosynthesis, calvin cycle", "biology",
+     ["biology/Photosynthesis", "biology/Calvin cycle", "biology/Chloroplast"]),
+    ("Where does the cell make ATP?", "atp, mitochondria", "biology",
+     ["biology/Mitochondria", "biology/Cellular respiration"]),
+    ("What makes an enzyme stop working?", "enzyme, denatured", "biology",
+     ["biology/Enzymes"]),
+    ("How is DNA copied?", "dna, replication", "biology",
+     ["biology/DNA replication"]),
+    ("What does the second law say?", "second law, entropy", "physics",
+     ["physics/Thermodynamics", "physics/Entropy"]),
+    ("Why can't an engine turn all heat into work?", "efficiency, carnot", "physics",
+     ["physics/Carnot engine", "physics/Thermodynamics", "physics/Entropy"]),
+    ("How is a voltage induced in a loop?", "induced, magnetic flux", "physics",
+     ["physics/Faraday's law", "physics/Electromagnetism"]),
+    ("When is momentum conserved?", "momentum", "physics",
+     ["physics/Newton's laws"]),
+    ("Where does the energy for life come from?", "energy, atp, glucose", "workspace",
+     ["biology/Photosynthesis", "biology/Mitochondria", "biology/Cellular respiration"]),
+]  # fmt: skip
+
+Strategy = Callable[[List[str], List[str]], List[Dict[str, Any]]]
+
+
+def make_workspace(rng: random.Random) -> None:
+    for project_id, notes in FIXTURE_NOTES.items():
+        project_path = settings.data_path / project_id
+        project_path.mkdir(parents=True)
+        for file_name, body in notes.items():
+            (project_path / f"{file_name}.md").write_text(
+                f"# {file_name}\n\n{body}\n", encoding="utf-8"
+            )
+        for i in range(FILLER_NOTES):
+            body = "\n".join(
+                " ".join(rng.choices(FILLER_WORDS, k=12))
+                for _ in range(rng.randint(5, 40))
+            )
+            (project_path / f"{project_id} notes {i}.md").write_text(
+                f"# {project_id} notes {i}\n\n{body}\n", encoding="utf-8"
+            )
+
+
+def wait_for_indexes() -> None:
+    indexing_service.start()
+    while True:
+        statuses = indexing_service.get_statuses()
+        if len(statuses) == len(FIXTURE_NOTES) and all(
+            status.state == "ready" for status in statuses
+        ):
+            return
+        time.sleep(0.1)
+
+
+def build_trigram_indexes() -> Dict[str, TrigramIndex]:
+    indexes = {}
+    for project_id in FIXTURE_NOTES:
+        index = TrigramIndex(project_id)
+        for path in list_note_paths(settings.data_path / project_id):
+            index.set_note(path.stem, read_note_text(path))
+        indexes[project_id] = index
+    return indexes
+
+
+def make_strategies(trigram_indexes: Dict[str, TrigramIndex]) -> Dict[str, Strategy]:
+    def scan(project_ids: List[str], terms: List[str]) -> List[Dict[str, Any]]:
+        results = [scan_project(project_id, terms) for project_id in project_ids]
+        return merge_shard_results(results, TOP_K_FILES)
+
+    def index(project_ids: List[str], terms: List[str]) -> List[Dict[str, Any]]:
+        return search_projects(project_ids, terms, TOP_K_FILES)
+
+    def index_diverse(project_ids: List[str], terms: List[str]) -> List[Dict[str, Any]]:
+        return select_diverse(
+            search_projects(project_ids, terms, CANDIDATE_FILES), TOP_K_FILES
+        )
+
+    def typeahead(project_ids: List[str], terms: List[str]) -> List[Dict[str, Any]]:
+        # Best typeahead score per note across the terms
+        scores: Dict[tuple, float] = {}
+        for project_id in project_ids:
+            for term in terms:
+                for hit in trigram_indexes[project_id].search(term, TOP_K_FILES):
+                    key = (project_id, hit.file)
+                    scores[key] = max(scores.get(key, 0.0), hit.score)
+
+        best = sorted(scores.items(), key=lambda item: -item[1])[:TOP_K_FILES]
+        found_files = []
+        for (project_id, file_name), score in best:
+            path = f"{project_id}/{file_name}.md"
+            found_files.append(
+                {
+                    "project": project_id,
+                    "file": file_name,
+                    "path": path,
+                    "content": read_note_text(settings.data_path / path) or "",
+                    "relevance": score,
+                }
+            )
+        return found_files
+
+    return {
+        "scan": scan,
+        "index": index,
+        "index + diversify": index_diverse,
+        "index + diversify + links": find_relevant_files,
+        "typeahead trigrams": typeahead,
+    }
+
+
+def evaluate(strategy: Strategy) -> Dict[str, float]:
+    recalls = {k: [] for k in K_VALUES}
+    reciprocal_ranks = []
+    file_counts = []
+    token_counts = []
+    timings = []
+
+    for _, search_query, scope, relevant in LABELED_QUESTIONS:
+        project_ids = list(FIXTURE_NOTES) if scope == "workspace" else [scope]
+        terms = [term.strip() for term in search_query.split(",")]
+
+        strategy(project_ids, terms)  # Warm up caches and lazy builds
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            found_files = strategy(project_ids, terms)
+            timings.append((time.perf_counter() - started) * 1e3)
+
+        ranked = [f"{f['project']}/{f['file']}" for f in found_files]
+        for k in K_VALUES:
+            recalls[k].append(len(set(ranked[:k]) & set(relevant)) / len(relevant))
+        first_relevant = next(
+            (rank for rank, note in enumerate(ranked, 1) if note in relevant), None
+        )
+        reciprocal_ranks.append(1 / first_relevant if first_relevant else 0.0)
+
+        context = format_found_files(
+            {
+                "search_scope": "workspace" if scope == "workspace" else "project",
+                "found_files": [to_found_file_entry(f) for f in found_files],
+            }
+        )
+        file_counts.append(len(found_files))
+        token_counts.append(len(context) / CHARS_PER_TOKEN)
+
+    timings.sort()
+    return {
+        **{f"recall@{k}": statistics.mean(values) for k, values in recalls.items()},
+        "mrr": statistics.mean(reciprocal_ranks),
+        "files": statistics.mean(file_counts),
+        "tokens": statistics.mean(token_counts),
+        "p50": statistics.median(timings),
+        "p95": timings[int(0.95 * len(timings)) - 1],
+    }
+
+
+def main() -> None:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as data_folder:
+        settings.data_folder = data_folder
+        make_workspace(rng)
+        wait_for_indexes()
+        try:
+            strategies = make_strategies(build_trigram_indexes())
+            print(
+                f"{len(LABELED_QUESTIONS)} questions, "
+                f"{sum(len(notes) for notes in FIXTURE_NOTES.values())} labeled notes, "
+                f"{FILLER_NOTES} filler notes per project\n"
+            )
+            print(
+                f"{'strategy':<26}"
+                + "".join(f" {f'R@{k}':>5}" for k in K_VALUES)
+                + f" {'MRR':>5} {'files':>5} {'tokens':>7} {'p50 ms':>7} {'p95 ms':>7}"
+            )
+            for label, strategy in strategies.items():
+                result = evaluate(strategy)
+                print(
+                    f"{label:<26}"
+                    + "".join(f" {result[f'recall@{k}']:5.2f}" for k in K_VALUES)
+                    + f" {result['mrr']:5.2f} {result['files']:5.1f}"
+                    f" {result['tokens']:7.0f} {result['p50']:7.2f} {result['p95']:7.2f}"
+                )
+        finally:
+            indexing_service.stop()
+
+
+if __name__ == "__main__":
+    main()
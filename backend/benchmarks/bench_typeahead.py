@@ -0,0 +1,81 @@
+"""Typeahead latency over a large project backed by the trigram index.
+
+Run from the backend folder:
+
+    uv run python -m benchmarks.bench_typeahead
+"""
+
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.logic.search.trigram import TrigramIndex
+from src.settings import settings
+
+NOTE_COUNT = 20_000
+REPEATS = 50
+TOPICS = [
+    "thermodynamics", "photosynthesis", "electromagnetism", "mitochondria",
+    "integration", "probability", "renaissance", "microeconomics", "neuroscience",
+    "linear algebra", "organic chemistry", "plate tectonics", "cryptography",
+]  # fmt: skip
+WORDS = [
+    "energy", "entropy", "cell", "membrane", "vector", "matrix", "market", "supply",
+    "demand", "neuron", "synapse", "theorem", "proof", "reaction", "enzyme", "field",
+    "charge", "current", "voltage", "gradient", "derivative", "history", "empire",
+]  # fmt: skip
+QUERIES = {
+    "name prefix": "thermo",
+    "name substring": "chemistry 12",
+    "content substring": "synapse gradient",
+    "typo (fuzzy)": "photosinthesis",
+    "common word": "energy",
+    "two letters": "ph",
+}
+
+
+def make_project(project_path: Path, rng: random.Random) -> TrigramIndex:
+    index = TrigramIndex(project_path.name)
+    for i in range(NOTE_COUNT):
+        name = f"{rng.choice(TOPICS)} {i}"
+        body = "\n".join(
+            " ".join(rng.choices(WORDS + TOPICS, k=12))
+            for _ in range(rng.randint(5, 30))
+        )
+        content = f"# {name}\n\n{body}\n"
+        (project_path / f"{name}.md").write_text(content, encoding="utf-8")
+        index.set_note(name, content)
+    return index
+
+
+def main() -> None:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as data_folder:
+        settings.data_folder = data_folder
+        project_path = Path(data_folder) / "bench"
+        project_path.mkdir()
+
+        started = time.perf_counter()
+        index = make_project(project_path, rng)
+        print(f"indexed {len(index)} notes in {time.perf_counter() - started:.1f} s")
+
+        for label, query in QUERIES.items():
+            timings = []
+            for _ in range(REPEATS):
+                started = time.perf_counter()
+                hits = index.search(query, 10)
+                timings.append((time.perf_counter() - started) * 1e3)
+            timings.sort()
+            top = hits[0] if hits else None
+            print(
+                f"{label:<18} {query!r:<20} p50 {statistics.median(timings):6.2f} ms"
+                f"  p95 {timings[int(0.95 * len(timings)) - 1]:6.2f} ms"
+                f"  hits {len(hits):2d}"
+                + (f"  top {top.file!r} ({top.match}, {top.score})" if top else "")
+            )
+
+
+if __name__ == "__main__":
+    main()
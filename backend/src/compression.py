@@ -0,0 +1,203 @@
+import asyncio
+import gzip
+import zlib
+from functools import partial
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        name, _, value = params.partition("=")
+        try:
+            if name.strip() == "q" and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class StreamCompressor:
+    # Compresses a body chunk by chunk; every chunk is flushed so the client
+    # can decode it right away while the dictionary carries over between chunks
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def compress_body(
+    body: bytes, encoding: str, gzip_level: int, brotli_quality: int
+) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        offload_size: int = 64 * 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def run_compression(self, func: Callable[..., bytes], data: bytes) -> bytes:
+        # Large bodies take tens of milliseconds to compress; that runs off the
+        # event loop so other requests and streams aren't stalled meanwhile
+        if len(data) < self.offload_size:
+            return func(data)
+        return await asyncio.get_running_loop().run_in_executor(None, func, data)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start_message: Optional[Message] = None
+        self._compressor: Optional[StreamCompressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self._passthrough = "content-encoding" in headers or not (
+                content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+            )
+            if self._passthrough:
+                await self._send(message)
+            elif content_type.startswith("text/event-stream"):
+                # Event streams may stay quiet for a while before their first
+                # event; their headers go out right away
+                self._start_streaming(message)
+                await self._send(message)
+            else:
+                # Held back until the first body chunk shows how to encode it
+                self._start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self._start_message is not None:
+            start_message, self._start_message = self._start_message, None
+            await self._send_first_body(start_message, message)
+            return
+
+        if self._compressor is None:
+            await self._send(message)
+            return
+
+        await self._send_compressed_chunk(message)
+
+    async def _send_first_body(self, start_message: Message, message: Message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self._send(start_message)
+            await self._send(message)
+            return
+
+        if more_body:
+            # Streams (chat answers) go out chunk by chunk
+            self._start_streaming(start_message)
+            await self._send(start_message)
+            await self._send_compressed_chunk(message)
+            return
+
+        middleware = self.middleware
+        body = await middleware.run_compression(
+            partial(
+                compress_body,
+                encoding=self.encoding,
+                gzip_level=middleware.gzip_level,
+                brotli_quality=middleware.brotli_quality,
+            ),
+            body,
+        )
+        headers = self._set_encoding_headers(start_message)
+        headers["Content-Length"] = str(len(body))
+        await self._send(start_message)
+        await self._send({**message, "body": body})
+
+    async def _send_compressed_chunk(self, message: Message) -> None:
+        body = await self.middleware.run_compression(
+            self._compressor.compress, message.get("body", b"")
+        )
+        if not message.get("more_body", False):
+            body += self._compressor.finish()
+        await self._send({**message, "body": body})
+
+    def _start_streaming(self, start_message: Message) -> None:
+        middleware = self.middleware
+        self._compressor = StreamCompressor(
+            self.encoding, middleware.gzip_level, middleware.brotli_quality
+        )
+        headers = self._set_encoding_headers(start_message)
+        del headers["Content-Length"]
+
+    def _set_encoding_headers(self, start_message: Message) -> MutableHeaders:
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        return headers
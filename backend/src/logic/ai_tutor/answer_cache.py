@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+from src.logic import events, metrics
+from src.logic.ai_tutor.state.tutor_state import TutorState
+from src.logic.projects_manager import get_content_hash
+from src.models import ChangeEvent
+from src.settings import settings
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, FrozenSet[str]]]" = OrderedDict()
+        self._keys_by_path: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        self._record_lookup(hit=entry is not None)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, answer: str, paths: Iterable[str]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            referenced_paths = frozenset(paths)
+            self._entries[key] = (answer, referenced_paths)
+            for path in referenced_paths:
+                self._keys_by_path.setdefault(path, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                metrics.increment("answer_cache", "evictions")
+
+    def invalidate_path(self, path: str) -> None:
+        with self._lock:
+            for key in self._keys_by_path.pop(path, set()):
+                self._remove(key)
+                metrics.increment("answer_cache", "invalidations")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+
+    def _record_lookup(self, hit: bool) -> None:
+        metrics.increment("answer_cache", "hits" if hit else "misses")
+        counters = metrics.get_counters("answer_cache")
+        metrics.set_value(
+            "answer_cache",
+            "hit_rate",
+            metrics.hit_rate(counters.get("hits", 0), counters.get("misses", 0)),
+        )
+
+    def _remove(self, key: str) -> None:
+        _, paths = self._entries.pop(key)
+        for path in paths:
+            keys = self._keys_by_path.get(path)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_path[path]
+
+
+answer_cache = AnswerCache(settings.answer_cache_max_entries)
+
+
+def build_answer_cache_key(state: TutorState) -> Tuple[str, Set[str]]:
+    question = " ".join(state["user_message"].lower().split())
+    highlighted = " ".join((state["highlighted_text"] or "").lower().split())
+
+    # References already carry content hashes, so nothing is re-read here
+    referenced = {}
+    for file_info in state.get("found_files") or []:
+        referenced[file_info["path"]] = file_info["hash"]
+
+    active_file = state.get("active_file") or {}
+    if active_file.get("path"):
+        referenced[active_file["path"]] = active_file["hash"]
+
+    # Follow-ups like "and the second one?" only make sense in their thread
+    history = "\n".join(
+        normalize_history_turn(turn) for turn in state.get("conversation_history") or []
+    )
+
+    key_parts = [
+        question,
+        highlighted,
+        state["query_type"],
+        active_file.get("hash") or get_content_hash(""),
+        get_content_hash(history),
+    ]
+    key_parts.extend(f"{path}:{referenced[path]}" for path in sorted(referenced))
+
+    return get_content_hash("\n".join(key_parts)), set(referenced)
+
+
+def normalize_history_turn(turn: Dict[str, Any]) -> str:
+    content = turn.get("content")
+    if isinstance(content, dict):
+        content = content.get("text")
+    text = " ".join(str(content or "").lower().split())
+    return f"{turn.get('role', '')}: {text}"
+
+
+def _on_change(event: ChangeEvent) -> None:
+    if event.type.startswith("project_"):
+        # Project moves invalidate every path beneath it, which is rare enough
+        # to just start over.
+        answer_cache.clear()
+        return
+
+    for path in (event.path, event.old_path):
+        if path:
+            answer_cache.invalidate_path(path)
+
+
+events.subscribe(_on_change)
@@ -0,0 +1,74 @@
+import re
+from typing import Callable, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+
+from src.logic import metrics
+from src.logic.ai_tutor.utils import get_llm, invoke_llm, record_token_usage
+from src.logic.search.tokenizer import tokenize
+from src.settings import settings
+
+HEDGING_PATTERN = re.compile(
+    r"\b(?:i'?m not (?:sure|certain)|i don'?t know|i'?m unable to|i cannot|i can'?t"
+    r"|not enough information|no information|unclear|hard to say"
+    r"|i don'?t have (?:access|enough))\b",
+    re.IGNORECASE,
+)
+# Short words are mostly glue and say nothing about where an answer came from
+MIN_CONTENT_TOKEN_LENGTH = 5
+
+MessageBuilder = Callable[[BaseChatModel], List[BaseMessage]]
+
+
+def get_low_confidence_reason(
+    answer: str, context: Optional[str] = None
+) -> Optional[str]:
+    # Cheap local signals only; anything doubtful goes to the main model
+    if len(answer.strip()) < settings.cascade_min_answer_chars:
+        return "too_short"
+    if HEDGING_PATTERN.search(answer):
+        return "hedging"
+
+    if context:
+        answer_tokens = {
+            token
+            for token in tokenize(answer)
+            if len(token) >= MIN_CONTENT_TOKEN_LENGTH
+        }
+        if answer_tokens:
+            context_tokens = set(tokenize(context))
+            overlap = len(answer_tokens & context_tokens) / len(answer_tokens)
+            if overlap < settings.cascade_min_context_overlap:
+                return "ignores_context"
+    return None
+
+
+def invoke_cascade(
+    node_name: str, build_messages: MessageBuilder, context: Optional[str] = None
+) -> AIMessage:
+    group = f"cascade.{node_name}"
+
+    lite_llm = get_llm(is_mini=True)
+    response = invoke_llm(lite_llm, build_messages(lite_llm))
+    record_token_usage(f"{node_name}.lite", response)
+
+    reason = get_low_confidence_reason(response.content, context)
+    if reason is None:
+        metrics.increment(group, "lite_answers")
+    else:
+        metrics.increment(group, "escalations")
+        metrics.increment(group, f"escalated_{reason}")
+        main_llm = get_llm(is_mini=False)
+        response = invoke_llm(main_llm, build_messages(main_llm))
+        record_token_usage(node_name, response)
+
+    counters = metrics.get_counters(group)
+    metrics.set_value(
+        group,
+        "escalation_rate",
+        metrics.hit_rate(
+            counters.get("escalations", 0), counters.get("lite_answers", 0)
+        ),
+    )
+    return response
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    PendingWrite,
+    copy_checkpoint,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from src.logic import metrics
+
+CacheKey = Tuple[str, str]
+# Keyed like the saver's writes table, so ordering and overwrites match
+PendingWrites = Dict[Tuple[str, int], PendingWrite]
+
+
+def _copy_checkpoint(checkpoint: Checkpoint) -> Checkpoint:
+    # copy_checkpoint leaves out newer keys such as updated_channels
+    return {**checkpoint, **copy_checkpoint(checkpoint)}
+
+
+def _cache_key(config: RunnableConfig) -> CacheKey:
+    configurable = config["configurable"]
+    return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+
+class HotThreadStateCache(BaseCheckpointSaver):
+    # Keeps the latest checkpoint of recently active threads in memory so
+    # consent resumes and follow-ups skip the SQLite read and deserialization.
+    # Writes go through to the wrapped saver and also update the cached entry.
+
+    def __init__(self, saver: BaseCheckpointSaver, max_entries: int, ttl: float):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, CheckpointTuple, PendingWrites]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        cached = self._get_cached(config)
+        if cached is None:
+            self._record_lookup(hit=False)
+            return self.saver.get_tuple(config)
+
+        self._record_lookup(hit=True)
+        checkpoint_tuple, pending_writes = cached
+        # Hand out copies so the graph can't mutate the cached checkpoint
+        return CheckpointTuple(
+            config=checkpoint_tuple.config,
+            checkpoint=_copy_checkpoint(checkpoint_tuple.checkpoint),
+            metadata=checkpoint_tuple.metadata,
+            parent_config=checkpoint_tuple.parent_config,
+            pending_writes=[
+                pending_writes[write_key] for write_key in sorted(pending_writes)
+            ],
+        )
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        try:
+            saved_config = self.saver.put(config, checkpoint, metadata, new_versions)
+        except Exception:
+            self._invalidate(config)
+            raise
+
+        # Cached as the wrapped saver would read it back
+        parent_id = config["configurable"].get("checkpoint_id")
+        checkpoint_tuple = CheckpointTuple(
+            config=saved_config,
+            checkpoint=_copy_checkpoint(checkpoint),
+            metadata=get_checkpoint_metadata(config, metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        **saved_config["configurable"],
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[],
+        )
+        with self._lock:
+            key = _cache_key(config)
+            self._entries[key] = (time.monotonic(), checkpoint_tuple, {})
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return saved_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        try:
+            self.saver.put_writes(config, writes, task_id, task_path)
+        except Exception:
+            self._invalidate(config)
+            raise
+
+        key = _cache_key(config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            checkpoint_tuple, pending_writes = entry[1], entry[2]
+            cached_id = checkpoint_tuple.config["configurable"]["checkpoint_id"]
+            if get_checkpoint_id(config) != cached_id:
+                return  # Writes for an older checkpoint; only the latest is kept
+
+            # Same rules as the saver's table: special writes replace, the
+            # rest keep the first value stored for a task and index
+            replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            for idx, (channel, value) in enumerate(writes):
+                write_key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                if replace or write_key not in pending_writes:
+                    pending_writes[write_key] = (task_id, channel, value)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == thread_id]:
+                del self._entries[key]
+        self.saver.delete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return self.saver.get_next_version(current, channel)
+
+    def _get_cached(
+        self, config: RunnableConfig
+    ) -> Optional[Tuple[CheckpointTuple, PendingWrites]]:
+        key = _cache_key(config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            cached_at, checkpoint_tuple, pending_writes = entry
+            if time.monotonic() - cached_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            checkpoint_id = get_checkpoint_id(config)
+            cached_id = checkpoint_tuple.config["configurable"]["checkpoint_id"]
+            if checkpoint_id is not None and checkpoint_id != cached_id:
+                return None
+
+            self._entries.move_to_end(key)
+            return checkpoint_tuple, dict(pending_writes)
+
+    def _invalidate(self, config: RunnableConfig) -> None:
+        with self._lock:
+            self._entries.pop(_cache_key(config), None)
+
+    def _record_lookup(self, hit: bool) -> None:
+        metrics.increment("thread_state_cache", "hits" if hit else "misses")
+        counters = metrics.get_counters("thread_state_cache")
+        metrics.set_value(
+            "thread_state_cache",
+            "hit_rate",
+            metrics.hit_rate(counters.get("hits", 0), counters.get("misses", 0)),
+        )
@@ -1,40 +1,67 @@
 import sqlite3
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Optional
 
 from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import END, StateGraph
+from langgraph.graph.state import CompiledStateGraph
 from langgraph.types import Command
 
-from src.logic.ai_tutor.edges.routing import route_after_analysis
+from src.logic.ai_tutor.checkpointing import HotThreadStateCache
+from src.logic.ai_tutor.edges.routing import (
+    route_after_analysis,
+    route_after_merged_analysis,
+)
+from src.logic.ai_tutor.nodes.analysis.merged_analysis import analyze_and_answer
 from src.logic.ai_tutor.nodes.analysis.query_analysis import analyze_user_query
 from src.logic.ai_tutor.nodes.consent.note_consent import request_note_edit_consent
 from src.logic.ai_tutor.nodes.generation.final_response import generate_final_response
 from src.logic.ai_tutor.nodes.generation.note_generation import generate_note_content
 from src.logic.ai_tutor.nodes.retrieval.note_search import search_notes
+from src.logic.ai_tutor.run_control import (
+    RunCancelledError,
+    RunControl,
+    reset_run_control,
+    set_run_control,
+)
 from src.logic.ai_tutor.state.tutor_state import TutorState
+from src.logic.blob_store import make_ref
 from src.settings import settings
 
 
 def create_tutor_graph_builder() -> StateGraph:
     graph = StateGraph(TutorState)
 
-    graph.add_node("analyze_query", analyze_user_query)
     graph.add_node("search_notes", search_notes)
     graph.add_node("generate_final_response", generate_final_response)
     graph.add_node("generate_note_content", generate_note_content)
     graph.add_node("request_note_edit_consent", request_note_edit_consent)
 
-    graph.set_entry_point("analyze_query")
-
-    graph.add_conditional_edges(
-        "analyze_query",
-        route_after_analysis,
-        {
-            "search_notes": "search_notes",
-            "generate_final_response": "generate_final_response",
-            "generate_note_content": "generate_note_content",
-        },
-    )
+    if settings.merged_general_answer_enabled:
+        # One main-model call both routes and, for GENERAL queries, answers
+        graph.add_node("analyze_and_answer", analyze_and_answer)
+        graph.set_entry_point("analyze_and_answer")
+        graph.add_conditional_edges(
+            "analyze_and_answer",
+            route_after_merged_analysis,
+            {
+                "search_notes": "search_notes",
+                "generate_note_content": "generate_note_content",
+                "end": END,
+            },
+        )
+    else:
+        graph.add_node("analyze_query", analyze_user_query)
+        graph.set_entry_point("analyze_query")
+        graph.add_conditional_edges(
+            "analyze_query",
+            route_after_analysis,
+            {
+                "search_notes": "search_notes",
+                "generate_final_response": "generate_final_response",
+                "generate_note_content": "generate_note_content",
+            },
+        )
 
     graph.add_edge("search_notes", "generate_final_response")
     graph.add_edge("generate_final_response", END)
@@ -45,6 +72,34 @@ def create_tutor_graph_builder() -> StateGraph:
     return graph
 
 
+_tutor_graph: Optional[CompiledStateGraph] = None
+_tutor_checkpointer: Optional[HotThreadStateCache] = None
+_tutor_graph_lock = threading.Lock()
+
+
+def get_tutor_graph() -> CompiledStateGraph:
+    # Compiled once per process and shared across requests, so resumes don't
+    # pay for rebuilding the graph or reopening the checkpoint database
+    global _tutor_graph, _tutor_checkpointer
+
+    with _tutor_graph_lock:
+        if _tutor_graph is None:
+            _tutor_checkpointer = HotThreadStateCache(
+                SqliteSaver(
+                    sqlite3.connect(
+                        settings.data_path / "ai_tutor_state.db",
+                        check_same_thread=False,
+                    )
+                ),
+                max_entries=settings.thread_state_cache_max_entries,
+                ttl=settings.thread_state_cache_ttl,
+            )
+            _tutor_graph = create_tutor_graph_builder().compile(
+                checkpointer=_tutor_checkpointer
+            )
+        return _tutor_graph
+
+
 def stream_ai_tutor_workflow(
     user_message: str,
     project_id: str,
@@ -52,51 +107,66 @@ def stream_ai_tutor_workflow(
     conversation_history: List[Dict[str, Any]] = [],
     highlighted_text: str = "",
     active_file_content: str = "",
+    active_file_path: str = "",
     hitl_input: Dict[str, any] = {},
+    search_scope: str = "project",
+    search_project_ids: List[str] = [],
+    cancelled: Optional[threading.Event] = None,
 ):
-    graph_builder = create_tutor_graph_builder()
-
-    checkpointer = SqliteSaver(
-        sqlite3.connect(
-            settings.data_path / "ai_tutor_state.db", check_same_thread=False
-        )
-    )
-    graph = graph_builder.compile(checkpointer=checkpointer)
+    graph = get_tutor_graph()
 
     if (
         hitl_input
     ):  # We assume if there's any kind of human-in-the-loop input, it's a resumption
         graph_input = Command(resume=hitl_input)
     else:  # Initial state
+        active_file = {}
+        if active_file_path:
+            active_file = make_ref(active_file_path, active_file_content or "")
+
         graph_input = TutorState(
             user_message=user_message,
             project_id=project_id,
             conversation_history=conversation_history,
             highlighted_text=highlighted_text,
-            active_file_content=active_file_content,
+            active_file=active_file,
             query_type="",
+            search_scope=search_scope,
+            search_project_ids=search_project_ids,
             search_query="",
             found_files=[],
-            file_contents="",
             pending_note_edit="",
             output_messages=[],
         )
 
     config = {"configurable": {"thread_id": thread_id}}
 
-    for step_result in graph.stream(graph_input, config):
-        if "__interrupt__" in step_result:
-            interrupt_type = step_result["__interrupt__"][0].value["type"]
-            if interrupt_type == "note_consent":
-                message = step_result["__interrupt__"][0].value["message"]
-                yield {"type": "consent", "content": message}
-            else:
-                yield {"type": "consent", "content": "Do you consent to the changes?"}
-        else:
-            step_state = list(step_result.values())[0]
-            if "output_messages" in step_state:
-                for output_message in step_state["output_messages"]:
+    # Nodes pick this up to stop LLM calls on disconnect and to budget time
+    control = RunControl(cancelled, settings.tutor_request_deadline)
+    token = set_run_control(control)
+    try:
+        for step_result in graph.stream(graph_input, config):
+            if control.is_cancelled():
+                return  # Closing the stream stops the graph before its next node
+            if "__interrupt__" in step_result:
+                interrupt_type = step_result["__interrupt__"][0].value["type"]
+                if interrupt_type == "note_consent":
+                    message = step_result["__interrupt__"][0].value["message"]
+                    yield {"type": "consent", "content": message}
+                else:
                     yield {
-                        "type": output_message["type"],
-                        "content": output_message["content"],
+                        "type": "consent",
+                        "content": "Do you consent to the changes?",
                     }
+            else:
+                step_state = list(step_result.values())[0]
+                if "output_messages" in step_state:
+                    for output_message in step_state["output_messages"]:
+                        yield {
+                            "type": output_message["type"],
+                            "content": output_message["content"],
+                        }
+    except RunCancelledError:
+        return
+    finally:
+        reset_run_control(token)
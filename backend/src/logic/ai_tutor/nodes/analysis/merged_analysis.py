@@ -0,0 +1,90 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from src.logic import metrics
+from src.logic.ai_tutor.answer_cache import answer_cache, build_answer_cache_key
+from src.logic.ai_tutor.nodes.analysis.query_analysis import build_routing_update
+from src.logic.ai_tutor.nodes.generation.final_response import (
+    build_response_messages,
+    generate_final_response,
+)
+from src.logic.ai_tutor.nodes.retrieval.note_search import format_found_files
+from src.logic.ai_tutor.run_control import get_step_budget
+from src.logic.ai_tutor.state.tutor_state import TutorState
+from src.logic.ai_tutor.utils import get_llm, invoke_llm, record_token_usage
+from src.prompts.helpers import load_prompt
+from src.settings import settings
+
+
+# Tool descriptions are taken from the docstrings
+class SearchNotes(BaseModel):
+    """Search the user's project notes before answering their question."""
+
+    keywords: List[str] = Field(description="Keywords to search the notes for")
+
+
+class AddToNote(BaseModel):
+    """Generate content from the conversation and add it to the user's note."""
+
+
+def analyze_and_answer(state: TutorState) -> TutorState:
+    budget = get_step_budget(settings.tutor_analysis_budget)
+    if budget is not None and budget <= 0:
+        # Out of time already, so answer directly rather than not at all
+        metrics.increment("tutor_deadline", "skipped_analysis")
+        return answer_without_routing(state)
+
+    if settings.answer_cache_enabled:
+        # Keyed as generate_final_response keys GENERAL answers, so both modes
+        # share entries; a hit skips the routing call as well
+        cache_key, referenced_paths = build_answer_cache_key(
+            {**state, "query_type": "GENERAL"}
+        )
+        cached_answer = answer_cache.get(cache_key)
+        if cached_answer is not None:
+            return {
+                "query_type": "GENERAL",
+                "output_messages": [{"type": "final", "content": cached_answer}],
+            }
+
+    llm = get_llm(is_mini=False).bind_tools([SearchNotes, AddToNote])
+
+    system_prompt = load_prompt("response_generation_system") + load_prompt(
+        "merged_analysis_system"
+    )
+    messages = build_response_messages(
+        llm, state, system_prompt, format_found_files(state)
+    )
+
+    try:
+        response = invoke_llm(llm, messages, timeout=budget)
+    except TimeoutError:
+        # The plain answer still has the time kept back for it
+        metrics.increment("tutor_deadline", "analysis_timeouts")
+        return answer_without_routing(state)
+    record_token_usage("analyze_and_answer", response)
+
+    for tool_call in response.tool_calls:
+        if tool_call["name"] == SearchNotes.__name__:
+            return build_routing_update(
+                state, "SEARCH", tool_call["args"].get("keywords")
+            )
+        if tool_call["name"] == AddToNote.__name__:
+            return build_routing_update(state, "ADD_TO_NOTE")
+
+    # No tool call means the model already answered a GENERAL query
+    answer = response.text()
+    if settings.answer_cache_enabled:
+        answer_cache.put(cache_key, answer, referenced_paths)
+    return {
+        "query_type": "GENERAL",
+        "output_messages": [{"type": "final", "content": answer}],
+    }
+
+
+def answer_without_routing(state: TutorState) -> TutorState:
+    return {
+        "query_type": "GENERAL",
+        **generate_final_response({**state, "query_type": "GENERAL"}),
+    }
@@ -1,13 +1,23 @@
 import json
+from typing import List, Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from src.logic import metrics
+from src.logic.ai_tutor.run_control import get_step_budget
 from src.logic.ai_tutor.state.tutor_state import TutorState
-from src.logic.ai_tutor.utils import get_llm
+from src.logic.ai_tutor.utils import get_llm, invoke_llm
 from src.prompts.helpers import load_prompt
+from src.settings import settings
 
 
 def analyze_user_query(state: TutorState) -> TutorState:
+    budget = get_step_budget(settings.tutor_analysis_budget)
+    if budget is not None and budget <= 0:
+        # Out of time already, so answer directly rather than not at all
+        metrics.increment("tutor_deadline", "skipped_analysis")
+        return build_routing_update(state, "GENERAL")
+
     llm = get_llm(is_mini=True)
 
     query_analysis_system = load_prompt("query_analysis_system")
@@ -23,39 +33,45 @@ def analyze_user_query(state: TutorState) -> TutorState:
         HumanMessage(content=query_analysis_prompt),
     ]
 
-    response = llm.invoke(messages).content.strip()
+    try:
+        response = invoke_llm(llm, messages, timeout=budget).content.strip()
+    except TimeoutError:
+        metrics.increment("tutor_deadline", "analysis_timeouts")
+        return build_routing_update(state, "GENERAL")
 
+    try:
+        analysis = json.loads(response)
+        return build_routing_update(
+            state, analysis.get("query_type", "GENERAL"), analysis.get("keywords")
+        )
+    except (json.JSONDecodeError, KeyError):
+        # Fallback
+        return build_routing_update(state, "GENERAL")
+
+
+def build_routing_update(
+    state: TutorState, query_type: str, keywords: Optional[List[str]] = None
+) -> TutorState:
     state_update = {
+        "query_type": query_type,
         "output_messages": [
             {"type": "step", "content": "Let me think about that for a bit."}
-        ]
+        ],
     }
 
-    try:
-        analysis = json.loads(response)
-        query_type = analysis.get("query_type", "GENERAL")
-        state_update["query_type"] = query_type
-
-        if query_type == "SEARCH":
-            state_update["search_query"] = state["user_message"]
-            if "keywords" in analysis:
-                state_update["search_query"] = ",".join(analysis["keywords"])
-            state_update["output_messages"] = [
-                {"type": "step", "content": "Searching your project files..."}
-            ]
-        elif query_type == "ADD_TO_NOTE":
-            state_update["output_messages"] = [
-                {
-                    "type": "step",
-                    "content": "Let me generate some information for your note...",
-                }
-            ]
-
-    except (json.JSONDecodeError, KeyError):
-        # Fallback
-        state_update["query_type"] = "GENERAL"
+    if query_type == "SEARCH":
+        state_update["search_query"] = state["user_message"]
+        if keywords:
+            state_update["search_query"] = ",".join(keywords)
         state_update["output_messages"] = [
-            {"type": "step", "content": "Let me think about that for a bit."}
+            {"type": "step", "content": "Searching your project files..."}
+        ]
+    elif query_type == "ADD_TO_NOTE":
+        state_update["output_messages"] = [
+            {
+                "type": "step",
+                "content": "Let me generate some information for your note...",
+            }
         ]
 
     return state_update
@@ -1,6 +1,53 @@
+from typing import Any, Dict
+
 from langgraph.types import interrupt
 
 from src.logic.ai_tutor.state.tutor_state import TutorState
+from src.logic.projects_manager import (
+    NoteVersionConflictError,
+    find_insert_offset,
+    get_content_hash,
+    insert_into_file,
+)
+from src.logic.search.tokenizer import read_note_text
+from src.models import NoteEditResult
+from src.settings import settings
+
+
+def apply_note_edit(state: TutorState, insert: Dict[str, Any]) -> NoteEditResult:
+    mode = insert.get("mode", "append")
+    insert_kwargs = {
+        "mode": mode,
+        "heading": insert.get("heading"),
+        "offset": insert.get("offset"),
+    }
+
+    active_file = state["active_file"]
+    try:
+        return insert_into_file(
+            active_file["path"],
+            state["pending_note_edit"],
+            expected_hash=active_file["hash"],
+            **insert_kwargs,
+        )
+    except NoteVersionConflictError:
+        if mode == "offset":
+            raise
+
+    # Appends and heading anchors still make sense on the newer version, e.g.
+    # after the editor auto-saved while the user was deciding. The anchor is
+    # checked against that version and the retry pinned to it, so a further
+    # change in between still comes back as a conflict.
+    current = read_note_text(settings.data_path / active_file["path"])
+    if current is None:
+        raise FileNotFoundError(f"File does not exist: {active_file['path']}")
+    find_insert_offset(current, **insert_kwargs)
+    return insert_into_file(
+        active_file["path"],
+        state["pending_note_edit"],
+        expected_hash=get_content_hash(current),
+        **insert_kwargs,
+    )
 
 
 def request_note_edit_consent(state: TutorState) -> TutorState:
@@ -12,9 +59,30 @@ def request_note_edit_consent(state: TutorState) -> TutorState:
     )
 
     if decision["content"] == "approve":
+        if not (state.get("active_file") or {}).get("path"):
+            return {
+                "output_messages": [
+                    {
+                        "type": "final",
+                        "content": "There's no open note to add this to. Open a note and try again.",
+                    }
+                ],
+                "pending_note_edit": "",
+            }
+
+        try:
+            result = apply_note_edit(state, decision.get("insert") or {})
+        except (FileNotFoundError, ValueError) as e:
+            return {
+                "output_messages": [
+                    {"type": "final", "content": f"Couldn't edit your note: {e}"}
+                ],
+                "pending_note_edit": "",
+            }
+
         return {
             "output_messages": [
-                {"type": "note", "content": state["pending_note_edit"]},
+                {"type": "note_patch", "content": result.model_dump_json()},
                 {"type": "final", "content": "Successfully edited note!"},
             ],
             "pending_note_edit": "",
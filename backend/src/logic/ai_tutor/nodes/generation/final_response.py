@@ -1,39 +1,79 @@
-from langchain_core.messages import HumanMessage, SystemMessage
+from typing import List
 
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+
+from src.logic.ai_tutor.answer_cache import answer_cache, build_answer_cache_key
+from src.logic.ai_tutor.cascade import invoke_cascade
+from src.logic.ai_tutor.nodes.retrieval.note_search import format_found_files
 from src.logic.ai_tutor.state.tutor_state import TutorState
-from src.logic.ai_tutor.utils import get_llm
+from src.logic.ai_tutor.utils import (
+    build_cached_messages,
+    get_llm,
+    invoke_llm,
+    record_token_usage,
+)
+from src.logic.blob_store import resolve_ref
 from src.prompts.helpers import load_prompt
+from src.settings import settings
 
 
 def generate_final_response(state: TutorState) -> TutorState:
-    llm = get_llm(is_mini=False)
-
-    if state["file_contents"]:
-        # Use context-aware prompt with file contents
-        context_template = load_prompt("context_response_user")
-        context_prompt = context_template.format(
-            user_message=state["user_message"],
-            file_contents=state["file_contents"],
-            conversation_history=state["conversation_history"],
-            active_file_content=state["active_file_content"],
-            highlighted_text=state["highlighted_text"] or "None",
+    if settings.answer_cache_enabled:
+        cache_key, referenced_paths = build_answer_cache_key(state)
+        cached_answer = answer_cache.get(cache_key)
+        if cached_answer is not None:
+            return {"output_messages": [{"type": "final", "content": cached_answer}]}
+
+    system_prompt = load_prompt("response_generation_system")
+    # Formatted once: it looks up note summaries and counts their use
+    file_contents = format_found_files(state)
+    if settings.cascade_enabled:
+        # Answers that don't draw on the retrieved notes get escalated
+        response = invoke_cascade(
+            "generate_final_response",
+            lambda llm: build_response_messages(
+                llm, state, system_prompt, file_contents
+            ),
+            context=file_contents or None,
         )
     else:
-        # Use general knowledge prompt
-        general_template = load_prompt("general_response_user")
-        context_prompt = general_template.format(
-            user_message=state["user_message"],
-            conversation_history=state["conversation_history"],
-            active_file_content=state["active_file_content"],
-            highlighted_text=state["highlighted_text"] or "None",
-        )
+        llm = get_llm(is_mini=False)
+        messages = build_response_messages(llm, state, system_prompt, file_contents)
 
-    system_prompt = load_prompt("response_generation_system")
+        response = invoke_llm(llm, messages)
+        record_token_usage("generate_final_response", response)
+
+    if settings.answer_cache_enabled:
+        answer_cache.put(cache_key, response.content, referenced_paths)
+
+    return {"output_messages": [{"type": "final", "content": response.content}]}
+
+
+def build_response_messages(
+    llm: Runnable, state: TutorState, system_prompt: str, file_contents: str
+) -> List[BaseMessage]:
+    # Stable context first (active file, then retrieved files) so it can be
+    # cached across turns; the growing history and the question come last.
+    cached_segments = []
+    active_file_content = (
+        resolve_ref(state["active_file"]) if state.get("active_file") else None
+    )
+    if active_file_content:
+        cached_segments.append(
+            load_prompt("active_file_context").format(
+                active_file_content=active_file_content
+            )
+        )
+    if file_contents:
+        cached_segments.append(
+            load_prompt("retrieved_context").format(file_contents=file_contents)
+        )
 
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=context_prompt),
-    ]
+    user_prompt = load_prompt("response_user").format(
+        user_message=state["user_message"],
+        conversation_history=state["conversation_history"],
+        highlighted_text=state["highlighted_text"] or "None",
+    )
 
-    response = llm.invoke(messages).content
-    return {"output_messages": [{"type": "final", "content": response}]}
+    return build_cached_messages(llm, system_prompt, cached_segments, user_prompt)
@@ -1,26 +1,42 @@
-from langchain_core.messages import HumanMessage, SystemMessage
-
+from src.logic.ai_tutor.cascade import invoke_cascade
 from src.logic.ai_tutor.state.tutor_state import TutorState
-from src.logic.ai_tutor.utils import get_llm
+from src.logic.ai_tutor.utils import (
+    build_cached_messages,
+    get_llm,
+    invoke_llm,
+    record_token_usage,
+)
 from src.prompts.helpers import load_prompt
+from src.settings import settings
 
 
 def generate_note_content(state: TutorState) -> TutorState:
-    llm = get_llm(is_mini=False)
-
-    note_template = load_prompt("note_generation_user")
-    note_prompt = note_template.format(
-        user_message=state["user_message"],
+    history_prompt = load_prompt("note_generation_history").format(
         conversation_history=state["conversation_history"],
+    )
+    note_prompt = load_prompt("note_generation_user").format(
+        user_message=state["user_message"],
         highlighted_text=state["highlighted_text"] or "None",
     )
 
     note_system = load_prompt("note_generation_system")
 
-    messages = [SystemMessage(content=note_system), HumanMessage(content=note_prompt)]
+    if settings.cascade_enabled:
+        response = invoke_cascade(
+            "generate_note_content",
+            lambda llm: build_cached_messages(
+                llm, note_system, [history_prompt], note_prompt
+            ),
+        )
+    else:
+        llm = get_llm(is_mini=False)
+        messages = build_cached_messages(
+            llm, note_system, [history_prompt], note_prompt
+        )
 
-    response = llm.invoke(messages).content
+        response = invoke_llm(llm, messages)
+        record_token_usage("generate_note_content", response)
     return {
-        "pending_note_edit": response,
+        "pending_note_edit": response.content,
         "output_messages": [{"type": "step", "content": "Note content generated."}],
     }
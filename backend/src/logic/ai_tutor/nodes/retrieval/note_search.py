@@ -1,7 +1,39 @@
+import itertools
+import uuid
+from typing import Any, Dict, List, Optional
+
+from src.logic import events, metrics
+from src.logic.ai_tutor.note_summaries import (
+    format_note_summary,
+    load_summary,
+    needs_summary,
+    summary_service,
+)
+from src.logic.ai_tutor.run_control import get_step_budget
 from src.logic.ai_tutor.state.tutor_state import TutorState
-from src.logic.projects_manager import get_single_project, open_file
+from src.logic.blob_store import make_ref, resolve_ref
+from src.logic.projects_manager import get_all_project_ids
+from src.logic.search.diversify import select_diverse
+from src.logic.search.link_graph import expand_with_linked_notes
+from src.logic.search.scanner import KeywordMatcher
+from src.logic.search.sharded import search_projects
+from src.logic.search.tokenizer import read_note_text
+from src.models import ChangeEvent
+from src.settings import settings
 
 TOP_K_FILES = 5
+CANDIDATE_FILES = 15
+MAX_LINKED_FILES = 3
+
+# Every note change is numbered, so a kept retrieval set only has to look at
+# the notes changed since it was built to tell whether a full search might now
+# find more. Project-wide changes (imports, renames) can't be narrowed down to
+# notes. The run id keeps numbers from before a restart from matching.
+_run_id = uuid.uuid4().hex
+_change_counter = itertools.count(1)
+_last_change = 0
+_note_changes: Dict[str, Dict[str, int]] = {}
+_project_changes: Dict[str, int] = {}
 
 
 def search_notes(state: TutorState) -> TutorState:
@@ -10,37 +42,65 @@ def search_notes(state: TutorState) -> TutorState:
     if state["query_type"] != "SEARCH":
         return state_update
 
+    budget = get_step_budget(settings.tutor_retrieval_budget)
+    if budget is not None and budget < settings.tutor_retrieval_budget:
+        # Too close to the deadline; an answer without notes beats none
+        metrics.increment("tutor_deadline", "skipped_retrieval")
+        state_update["found_files"] = []
+        state_update["output_messages"] = [
+            {
+                "type": "step",
+                "content": "Running short on time, so I'll answer without searching your notes.",
+            }
+        ]
+        return state_update
+
+    is_workspace_search = state.get("search_scope") == "workspace"
+    if is_workspace_search:
+        project_ids = state.get("search_project_ids") or get_all_project_ids()
+    else:
+        project_ids = [state["project_id"]]
+    project_ids = sorted(project_ids)
+
     try:
-        project = get_single_project(state["project_id"])
-
-        found_files = []
-        search_terms = state["search_query"].lower().split(",")
-
-        # Simple keyword search
-        # TODO: Replace with more sophisticated search (e.g., TF-IDF, semantic search)
-        for file_name in project.file_names:
-            try:
-                file_content = open_file(f"{project.path}/{file_name}.md")
-                content_lower = file_content.content.lower()
-
-                matches = sum(1 for term in search_terms if term in content_lower)
-
-                if matches > 0:
-                    found_files.append(
-                        {
-                            "project": project.name,
-                            "file": file_name,
-                            "path": file_content.path,
-                            "content": file_content.content,
-                            "relevance": matches,
-                        }
-                    )
-            except Exception:
-                continue
+        search_terms = list(
+            dict.fromkeys(
+                term.strip()
+                for term in state["search_query"].lower().split(",")
+                if term.strip()
+            )
+        )
+
+        previous = state.get("retrieval_cache") or {}
+        checked_at = f"{_run_id}:{_last_change}"
+        if (
+            previous.get("project_ids") == project_ids
+            and previous.get("files")
+            and set(previous.get("terms", [])) & set(search_terms)
+            and not has_new_matches(previous, project_ids, search_terms)
+        ):
+            # Follow-ups usually ask about the same notes, so the last turn's
+            # set is kept (and its order, which keeps the prompt prefix stable)
+            found_files = extend_previous_files(
+                previous["files"],
+                project_ids,
+                [term for term in search_terms if term not in previous["terms"]],
+            )
+            metrics.increment("retrieval_reuse", "reused_turns")
+        else:
+            found_files = [
+                to_found_file_entry(file_info)
+                for file_info in find_relevant_files(project_ids, search_terms)
+            ]
+            metrics.increment("retrieval_reuse", "searched_turns")
 
-        found_files.sort(key=lambda x: x["relevance"], reverse=True)
-        found_files = found_files[:TOP_K_FILES]
         state_update["found_files"] = found_files
+        state_update["retrieval_cache"] = {
+            "project_ids": project_ids,
+            "checked_at": checked_at,
+            "terms": search_terms,
+            "files": found_files,
+        }
 
         if found_files:
             file_count = len(found_files)
@@ -50,24 +110,14 @@ def search_notes(state: TutorState) -> TutorState:
                     "content": f"Found {file_count} relevant file(s). Analyzing the content...",
                 }
             ]
-
-            # Prepare content for LLM processing
-            contents = []
-            for file_info in found_files:
-                contents.append(
-                    f"File: {file_info['file']}\nContent: {file_info['content']}\n---"
-                )
-            state_update["file_contents"] = "\n".join(contents)
         else:
             state_update["output_messages"] = [
                 {"type": "step", "content": "No relevant files found in your project."}
             ]
-            state_update["file_contents"] = ""
     except ValueError:
         state_update["output_messages"] = [
             {"type": "step", "content": f"Project not found: {state['project_id']}"}
         ]
-        state_update["file_contents"] = ""
     except Exception:
         state_update["output_messages"] = [
             {
@@ -75,6 +125,179 @@ def search_notes(state: TutorState) -> TutorState:
                 "content": "Had trouble searching files, but I'll do my best to help.",
             }
         ]
-        state_update["file_contents"] = ""
 
     return state_update
+
+
+def has_new_matches(
+    previous: Dict[str, Any], project_ids: List[str], search_terms: List[str]
+) -> bool:
+    # Notes in the kept set are re-checked one by one when it's reused; this
+    # only looks for notes outside it that now match a repeated term
+    run_id, _, checked = (previous.get("checked_at") or "").partition(":")
+    if run_id != _run_id:
+        return True
+    checked = int(checked)
+
+    known_paths = {file_info["path"] for file_info in previous["files"]}
+    matcher = KeywordMatcher(
+        [term for term in search_terms if term in previous["terms"]]
+    )
+    for project_id in project_ids:
+        if _project_changes.get(project_id, 0) > checked:
+            return True
+        for path, changed in list(_note_changes.get(project_id, {}).items()):
+            if changed <= checked or path in known_paths:
+                continue
+            content = read_note_text(settings.data_path / path)
+            if content is not None and matcher.find(content.lower()):
+                return True
+    return False
+
+
+def find_relevant_files(
+    project_ids: List[str], search_terms: List[str]
+) -> List[Dict[str, Any]]:
+    # Simple keyword search, each project is queried as a separate shard
+    # TODO: Replace with more sophisticated search (e.g., TF-IDF, semantic search)
+    # Extra candidates so the slots left after dropping copies still fill up
+    candidates = search_projects(project_ids, search_terms, CANDIDATE_FILES)
+    found_files = select_diverse(candidates, TOP_K_FILES)
+    # Notes linked from the hits often hold the definitions they rely on
+    found_files = expand_with_linked_notes(found_files, MAX_LINKED_FILES)
+    return select_diverse(found_files, len(found_files))
+
+
+def extend_previous_files(
+    previous_files: List[Dict[str, Any]],
+    project_ids: List[str],
+    new_terms: List[str],
+) -> List[Dict[str, Any]]:
+    found_files = []
+    for file_info in previous_files:
+        refreshed = refresh_found_file_entry(file_info)
+        if refreshed is not None:
+            found_files.append(refreshed)
+
+    if not new_terms:
+        return found_files
+
+    # Only the terms the previous turn didn't cover are searched
+    known_paths = {file_info["path"] for file_info in found_files}
+    new_files = [
+        file_info
+        for file_info in find_relevant_files(project_ids, new_terms)
+        if file_info["path"] not in known_paths
+    ]
+    if not new_files:
+        return found_files
+
+    previous_with_content = [
+        {**file_info, "content": resolve_ref(file_info) or ""}
+        for file_info in found_files
+    ]
+    selected = select_diverse(
+        previous_with_content + new_files, TOP_K_FILES + MAX_LINKED_FILES
+    )
+    selected_paths = {file_info["path"] for file_info in selected}
+
+    return [
+        file_info for file_info in found_files if file_info["path"] in selected_paths
+    ] + [
+        to_found_file_entry(file_info)
+        for file_info in new_files
+        if file_info["path"] in selected_paths
+    ]
+
+
+def to_found_file_entry(file_info: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        stat = (settings.data_path / file_info["path"]).stat()
+        note_stat = [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        note_stat = None
+
+    return {
+        "project": file_info["project"],
+        "file": file_info["file"],
+        "relevance": file_info["relevance"],
+        "stat": note_stat,
+        **make_ref(file_info["path"], file_info["content"]),
+    }
+
+
+def refresh_found_file_entry(file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # A stat is enough to tell whether a note changed since the last turn;
+    # only changed notes are read again
+    note_path = settings.data_path / file_info["path"]
+    try:
+        stat = note_path.stat()
+    except OSError:
+        return None  # Deleted or renamed since
+
+    note_stat = [stat.st_mtime_ns, stat.st_size]
+    if note_stat == file_info.get("stat"):
+        metrics.increment("retrieval_reuse", "reused_files")
+        return file_info
+
+    content = read_note_text(note_path)
+    if content is None:
+        return None
+    metrics.increment("retrieval_reuse", "reread_files")
+    return {
+        **file_info,
+        "stat": note_stat,
+        **make_ref(file_info["path"], content),
+    }
+
+
+def format_found_files(state: TutorState) -> str:
+    # Resolves the references lazily, right before the contents are needed
+    is_workspace_search = state.get("search_scope") == "workspace"
+
+    contents = []
+    for rank, file_info in enumerate(state.get("found_files") or []):
+        content = resolve_ref(file_info)
+        if content is None:
+            continue
+        file_label = file_info["file"]
+        if is_workspace_search:
+            file_label = f"{file_info['project']}/{file_label}"
+
+        summary = None
+        if (
+            settings.background_summaries_enabled
+            and rank >= settings.full_text_context_files
+            and needs_summary(content)
+        ):
+            # Lower-ranked hits only need the gist; notes without a summary
+            # yet go out in full and get one for next time
+            summary = load_summary(file_info["hash"])
+            if summary is None:
+                summary_service.enqueue(file_info["path"])
+                metrics.increment("summaries", "missing")
+            else:
+                metrics.increment("summaries", "used")
+
+        if summary is None:
+            contents.append(f"File: {file_label}\nContent: {content}\n---")
+        else:
+            contents.append(
+                f"File: {file_label}\nSummary: {format_note_summary(summary)}\n---"
+            )
+    return "\n".join(contents)
+
+
+def _on_change(event: ChangeEvent) -> None:
+    # Notes created or edited since the last turn may now match its terms
+    global _last_change
+
+    change = next(_change_counter)
+    if event.type.startswith("file_") and event.path:
+        _note_changes.setdefault(event.project_id, {})[event.path] = change
+    else:
+        _project_changes[event.project_id] = change
+    _last_change = change
+
+
+events.subscribe(_on_change)
@@ -0,0 +1,242 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import traceback
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.logic import events, metrics
+from src.logic.ai_tutor.single_flight import count_active_runs
+from src.logic.ai_tutor.utils import get_llm, record_token_usage
+from src.logic.json_codec import dumps, loads
+from src.logic.projects_manager import get_content_hash
+from src.logic.search.tokenizer import chunk_note, read_note_text
+from src.models import ChangeEvent
+from src.prompts.helpers import load_prompt
+from src.settings import settings
+
+SUMMARY_FOLDER_NAME = ".summaries"
+SUMMARY_FORMAT_VERSION = 1
+IDLE_POLL_INTERVAL = 0.5
+
+NoteSummary = Dict[str, Any]  # {"summary": str, "sections": [{"heading", "summary"}]}
+
+
+def get_summary_path(content_hash: str) -> Path:
+    # Keyed by content, so renames and copies share one summary
+    return settings.data_path / SUMMARY_FOLDER_NAME / content_hash[:2] / content_hash
+
+
+def load_summary(content_hash: str) -> Optional[NoteSummary]:
+    summary_path = get_summary_path(content_hash)
+    try:
+        with open(summary_path, "rb") as f:
+            data = loads(f.read())
+        # Refresh the mtime so pruning only drops summaries nobody reads
+        os.utime(summary_path)
+    except (OSError, ValueError):
+        return None
+
+    if data.get("version") != SUMMARY_FORMAT_VERSION:
+        return None
+    return data
+
+
+def save_summary(content_hash: str, summary: NoteSummary) -> None:
+    summary_path = get_summary_path(content_hash)
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(
+        dir=summary_path.parent, prefix=f".{content_hash}.", suffix=".tmp"
+    )
+    with os.fdopen(fd, "wb") as f:
+        f.write(dumps({"version": SUMMARY_FORMAT_VERSION, **summary}))
+    os.replace(temp_path, summary_path)
+
+
+def prune_summaries(max_age_days: float) -> int:
+    summary_root = settings.data_path / SUMMARY_FOLDER_NAME
+    if not summary_root.exists():
+        return 0
+
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for summary_path in summary_root.glob("*/*"):
+        try:
+            if summary_path.stat().st_mtime < cutoff:
+                summary_path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def needs_summary(content: str) -> bool:
+    # Short notes cost about as much as their summary would
+    return len(content) >= settings.summary_min_chars
+
+
+def summarize_note(note_title: str, content: str) -> NoteSummary:
+    chunks = chunk_note(content)
+    note_sections = "\n\n".join(
+        f"## Section {index + 1}: {heading or '(untitled)'}\n{content[start:end]}"
+        for index, (start, end, heading) in enumerate(chunks)
+    )
+
+    llm = get_llm(is_mini=True)
+    messages = [
+        SystemMessage(content=load_prompt("note_summary_system")),
+        HumanMessage(
+            content=load_prompt("note_summary_user").format(
+                note_title=note_title, note_sections=note_sections
+            )
+        ),
+    ]
+    response = llm.invoke(messages)
+    record_token_usage("summarize_note", response)
+
+    try:
+        data = json.loads(response.content.strip())
+        summary = str(data["summary"]).strip()
+        section_summaries = [str(s).strip() for s in data.get("sections") or []]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        # Fallback
+        summary = response.content.strip()
+        section_summaries = []
+
+    # Only trust per-section summaries that line up with the sections
+    sections = []
+    if len(section_summaries) == len(chunks):
+        sections = [
+            {"heading": heading, "summary": section_summary}
+            for (_, _, heading), section_summary in zip(chunks, section_summaries)
+            if heading and section_summary
+        ]
+    return {"summary": summary, "sections": sections}
+
+
+def format_note_summary(summary: NoteSummary) -> str:
+    lines = [summary["summary"]]
+    lines.extend(
+        f"- {section['heading']}: {section['summary']}"
+        for section in summary.get("sections", [])
+    )
+    return "\n".join(lines)
+
+
+class SummaryService:
+    def __init__(self):
+        # Path -> when it may be summarized; edits push that back
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_call_at = 0.0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        # Only changes are summarized up front; existing notes are picked up
+        # when retrieval first finds them without a summary
+        events.subscribe(self._on_change)
+        self._thread = threading.Thread(
+            target=self._run, name="note-summarizer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        events.unsubscribe(self._on_change)
+        self._stop.set()
+        with self._changed:
+            self._changed.notify()
+        self._thread.join()
+        self._thread = None
+
+    def enqueue(self, path: str, delay: float = 0.0) -> None:
+        if self._thread is None:
+            return
+
+        with self._changed:
+            due = time.monotonic() + delay
+            if delay or path not in self._pending:
+                self._pending[path] = due
+                self._changed.notify()
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        if event.type in ("file_saved", "file_created", "file_renamed") and (
+            event.path and event.path.endswith(".md")
+        ):
+            # Auto-save fires every few seconds while a note is being typed
+            # in; it's summarized once the edits settle
+            self.enqueue(event.path, delay=settings.summary_quiet_period)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            path = self._wait_for_due_path()
+            if path is None or not self._wait_for_turn():
+                continue
+
+            with self._lock:
+                due = self._pending.get(path)
+                if due is None or due > time.monotonic():
+                    continue  # Edited again while waiting for its turn
+                del self._pending[path]
+            try:
+                self._summarize_path(path)
+            except Exception:
+                print(traceback.format_exc())
+                metrics.increment("summaries", "failed")
+
+    def _wait_for_due_path(self) -> Optional[str]:
+        with self._changed:
+            while not self._stop.is_set():
+                if not self._pending:
+                    self._changed.wait()
+                    continue
+                path, due = min(self._pending.items(), key=itemgetter(1))
+                delay = due - time.monotonic()
+                if delay <= 0:
+                    return path
+                self._changed.wait(delay)
+        return None
+
+    def _summarize_path(self, path: str) -> None:
+        # Read when its turn comes, so the summary matches the latest save
+        content = read_note_text(settings.data_path / path)
+        if content is None or not needs_summary(content):
+            return
+
+        content_hash = get_content_hash(content)
+        if load_summary(content_hash) is not None:
+            return  # Saved without changing the content
+
+        self._next_call_at = time.monotonic() + 60.0 / settings.summary_rate_per_minute
+        summary = summarize_note(Path(path).stem, content)
+        save_summary(content_hash, summary)
+        metrics.increment("summaries", "generated")
+
+    def _wait_for_turn(self) -> bool:
+        # Interactive chats go first, and summaries never exceed their rate
+        while not self._stop.is_set():
+            delay = self._next_call_at - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            elif count_active_runs():
+                self._stop.wait(IDLE_POLL_INTERVAL)
+            else:
+                return True
+        return False
+
+
+summary_service = SummaryService()
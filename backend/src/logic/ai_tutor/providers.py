@@ -0,0 +1,292 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import (
+    BaseChatModel,
+    generate_from_stream,
+)
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+
+from src.settings import settings
+
+CACHE_CONTROL_PROVIDERS = {"anthropic"}
+
+
+def strip_cache_control(messages: List[BaseMessage]) -> List[BaseMessage]:
+    stripped = []
+    for message in messages:
+        if isinstance(message.content, list):
+            content = [
+                {k: v for k, v in block.items() if k != "cache_control"}
+                if isinstance(block, dict)
+                else block
+                for block in message.content
+            ]
+            message = message.model_copy(update={"content": content})
+        stripped.append(message)
+    return stripped
+
+
+class ProviderHealth:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._first_token_latencies = deque(maxlen=settings.hedge_latency_window)
+        self._outcomes = deque(maxlen=settings.circuit_breaker_window)
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def record_first_token(self, latency: float) -> None:
+        with self._lock:
+            self._first_token_latencies.append(latency)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._outcomes.append(True)
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._outcomes.append(False)
+            if self._trial_in_flight:
+                # Half-open trial failed, stay open for another cooldown
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                return
+
+            if len(self._outcomes) < settings.circuit_breaker_min_requests:
+                return
+            error_rate = self._outcomes.count(False) / len(self._outcomes)
+            if error_rate >= settings.circuit_breaker_error_rate:
+                self._opened_at = time.monotonic()
+
+    def allow_request(self) -> Optional[str]:
+        # "closed" for a normal request, "trial" for the one half-open probe
+        # (the caller hands it back if the request ends without an outcome),
+        # None while the breaker is open
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._trial_in_flight:
+                return None
+            if time.monotonic() - self._opened_at >= settings.circuit_breaker_cooldown:
+                self._trial_in_flight = True
+                return "trial"
+            return None
+
+    def release_trial(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            latencies = sorted(self._first_token_latencies)
+
+        if len(latencies) < settings.hedge_min_samples:
+            delay = settings.hedge_initial_delay
+        else:
+            index = min(
+                len(latencies) - 1, int(settings.hedge_percentile * len(latencies))
+            )
+            delay = latencies[index]
+        return max(delay, settings.hedge_min_delay)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            return {
+                "state": "closed" if self._opened_at is None else "open",
+                "recent_requests": len(outcomes),
+                "recent_errors": outcomes.count(False),
+                "latency_samples": len(self._first_token_latencies),
+            }
+
+
+_provider_health: Dict[str, ProviderHealth] = {}
+_provider_health_lock = threading.Lock()
+
+
+def get_provider_health(name: str) -> ProviderHealth:
+    with _provider_health_lock:
+        if name not in _provider_health:
+            _provider_health[name] = ProviderHealth(name)
+        return _provider_health[name]
+
+
+def get_provider_health_snapshot() -> Dict[str, Dict[str, Any]]:
+    with _provider_health_lock:
+        names = list(_provider_health)
+    return {name: get_provider_health(name).snapshot() for name in names}
+
+
+def _run_provider(
+    name: str,
+    model: Runnable,
+    messages: List[BaseMessage],
+    stop: Optional[List[str]],
+    kwargs: Dict[str, Any],
+    events: queue.Queue,
+    cancelled: threading.Event,
+) -> None:
+    health = get_provider_health(name)
+    started = time.monotonic()
+    received_first_token = False
+    if name not in CACHE_CONTROL_PROVIDERS:
+        messages = strip_cache_control(messages)
+
+    try:
+        stream = model.stream(messages, stop=stop, **kwargs)
+        try:
+            # A provider stuck before its first chunk can't be interrupted here;
+            # it is dropped as soon as it yields anything after cancellation.
+            for chunk in stream:
+                if not received_first_token:
+                    health.record_first_token(time.monotonic() - started)
+                    received_first_token = True
+                if cancelled.is_set():
+                    return
+                events.put((name, "chunk", chunk))
+        finally:
+            stream.close()
+    except Exception as e:
+        health.record_failure()
+        events.put((name, "error", e))
+        return
+
+    health.record_success()
+    events.put((name, "done", None))
+
+
+class HedgedChatModel(BaseChatModel):
+    # Chat models, or chat models with tools already bound to them
+    providers: List[Tuple[str, Runnable]]
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "HedgedChatModel":
+        return HedgedChatModel(
+            providers=[
+                (name, model.bind_tools(tools, **kwargs))
+                for name, model in self.providers
+            ]
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return generate_from_stream(
+            self._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        events: queue.Queue = queue.Queue()
+        cancel_events: Dict[str, threading.Event] = {}
+        pending = list(self.providers)
+        trials: Set[str] = set()
+        finished: Set[str] = set()
+
+        def start(name: str, model: Runnable) -> float:
+            cancel_events[name] = threading.Event()
+            threading.Thread(
+                target=_run_provider,
+                args=(name, model, messages, stop, kwargs, events, cancel_events[name]),
+                daemon=True,
+            ).start()
+            return time.monotonic() + get_provider_health(name).hedge_delay()
+
+        def launch_next() -> Optional[float]:
+            while pending:
+                name, model = pending.pop(0)
+                admission = get_provider_health(name).allow_request()
+                if admission is not None:
+                    if admission == "trial":
+                        trials.add(name)
+                    return start(name, model)
+            return None
+
+        def cancel(name: str) -> None:
+            cancel_events[name].set()
+            # A cancelled run reports no outcome, so a half-open trial it holds
+            # is handed back now rather than whenever it next yields, which
+            # could be minutes if it's stuck
+            if name in trials and name not in finished:
+                get_provider_health(name).release_trial()
+
+        deadline = launch_next()
+        if deadline is None:
+            # Every breaker is open, so trying the primary beats failing outright
+            deadline = start(*self.providers[0])
+
+        running = 1
+        winner: Optional[str] = None
+        first_chunk = None
+
+        while winner is None:
+            timeout = max(deadline - time.monotonic(), 0) if pending else None
+            try:
+                name, kind, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                next_deadline = launch_next()
+                if next_deadline is not None:
+                    deadline = next_deadline
+                    running += 1
+                continue
+
+            if kind == "error":
+                finished.add(name)
+                running -= 1
+                next_deadline = launch_next()
+                if next_deadline is not None:
+                    deadline = next_deadline
+                    running += 1
+                elif running == 0:
+                    raise payload
+                continue
+
+            winner = name
+            if kind == "chunk":
+                first_chunk = payload
+            else:
+                finished.add(name)
+
+        for name in list(cancel_events):
+            if name != winner:
+                cancel(name)
+
+        try:
+            if first_chunk is None:
+                return
+            yield ChatGenerationChunk(message=first_chunk)
+
+            while True:
+                name, kind, payload = events.get()
+                if name != winner:
+                    continue
+                if kind == "chunk":
+                    yield ChatGenerationChunk(message=payload)
+                    continue
+                finished.add(name)
+                if kind == "error":
+                    raise payload
+                return
+        finally:
+            cancel(winner)
@@ -0,0 +1,62 @@
+import contextvars
+import threading
+import time
+from typing import Optional
+
+from src.settings import settings
+
+
+class RunCancelledError(Exception):
+    pass
+
+
+class RunControl:
+    def __init__(
+        self,
+        cancelled: Optional[threading.Event] = None,
+        deadline_seconds: float = 0.0,
+    ):
+        self.cancelled = cancelled or threading.Event()
+        self.deadline = (
+            time.monotonic() + deadline_seconds if deadline_seconds > 0 else None
+        )
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled.is_set():
+            raise RunCancelledError()
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+
+_current_run_control: contextvars.ContextVar[Optional[RunControl]] = (
+    contextvars.ContextVar("tutor_run_control", default=None)
+)
+
+
+def get_run_control() -> Optional[RunControl]:
+    return _current_run_control.get()
+
+
+def set_run_control(control: Optional[RunControl]) -> contextvars.Token:
+    # Graph nodes run in copies of this context, so they all see the control
+    return _current_run_control.set(control)
+
+
+def reset_run_control(token: contextvars.Token) -> None:
+    _current_run_control.reset(token)
+
+
+def get_step_budget(step_budget: float) -> Optional[float]:
+    # Seconds a step may take while still leaving the final answer its share
+    # of the deadline; None when the run has no deadline
+    control = get_run_control()
+    if control is None or control.deadline is None:
+        return None
+    remaining = control.remaining() - settings.tutor_answer_reserve
+    return max(0.0, min(step_budget, remaining))
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.logic import metrics
+from src.settings import settings
+
+StreamEvent = Any  # Passed through untouched, e.g. encoded SSE frames
+
+_FINISHED = object()
+
+
+class InFlightRun:
+    def __init__(self):
+        self.events: List[StreamEvent] = []
+        self.error: Optional[Exception] = None
+        self.finished_at: Optional[float] = None
+        # Set once every subscriber has gone, so the run can stop early
+        self.cancelled = threading.Event()
+        self._subscribers: List["RunSubscription"] = []
+        self._lock = threading.Lock()
+
+    def append(self, event: StreamEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+            for subscription in self._subscribers:
+                subscription._push(event)
+
+    def finish(self, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self.error = error
+            self.finished_at = time.monotonic()
+            for subscription in self._subscribers:
+                subscription._push(_FINISHED)
+
+    def subscribe(self) -> "RunSubscription":
+        # Called on the subscriber's event loop. Every subscriber replays from
+        # the first event, so late duplicates see exactly what the original
+        # client saw.
+        subscription = RunSubscription(self, asyncio.get_running_loop())
+        with self._lock:
+            for event in self.events:
+                subscription._queue.put_nowait(event)
+            if self.finished_at is not None:
+                subscription._queue.put_nowait(_FINISHED)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: "RunSubscription") -> None:
+        with self._lock:
+            self._subscribers.remove(subscription)
+            if not self._subscribers and self.finished_at is None:
+                self.cancelled.set()
+                metrics.increment("single_flight", "cancelled")
+
+
+class RunSubscription:
+    # Events are handed from the run's thread to the subscriber's event loop,
+    # so waiting for the next one doesn't hold a worker thread.
+    def __init__(self, run: InFlightRun, loop: asyncio.AbstractEventLoop):
+        self._run = run
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._closed = False
+
+    def __aiter__(self) -> "RunSubscription":
+        return self
+
+    async def __anext__(self) -> StreamEvent:
+        if self._closed:
+            raise StopAsyncIteration
+        event = await self._queue.get()
+        if self._closed:
+            raise StopAsyncIteration
+        if event is not _FINISHED:
+            return event
+
+        error = self._run.error
+        self.close()
+        if error is not None:
+            raise error
+        raise StopAsyncIteration
+
+    def close(self) -> None:
+        # Called when the client goes away; also wakes a pending __anext__
+        if self._closed:
+            return
+        self._closed = True
+        self._run._unsubscribe(self)
+        self._push(_FINISHED)
+
+    def _push(self, event: StreamEvent) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        except RuntimeError:
+            pass  # The loop has shut down, so nobody is listening anymore
+
+
+_runs: Dict[str, InFlightRun] = {}
+_runs_lock = threading.Lock()
+
+
+def _drive(
+    key: str,
+    run: InFlightRun,
+    start: Callable[[threading.Event], Iterator[StreamEvent]],
+):
+    try:
+        for event in start(run.cancelled):
+            run.append(event)
+    except Exception as e:
+        # Failures aren't replayed; a retry gets a fresh run
+        with _runs_lock:
+            if _runs.get(key) is run:
+                del _runs[key]
+        run.finish(error=e)
+    else:
+        run.finish()
+
+
+def _expire_finished_runs() -> None:
+    now = time.monotonic()
+    for key, run in list(_runs.items()):
+        if (
+            run.finished_at is not None
+            and now - run.finished_at > settings.single_flight_replay_window
+        ):
+            del _runs[key]
+
+
+def count_active_runs() -> int:
+    with _runs_lock:
+        return sum(1 for run in _runs.values() if run.finished_at is None)
+
+
+def stream_single_flight(
+    key: str, start: Callable[[threading.Event], Iterator[StreamEvent]]
+) -> RunSubscription:
+    with _runs_lock:
+        _expire_finished_runs()
+        run = _runs.get(key)
+        # A run everyone walked away from is cut short, so it isn't replayed;
+        # neither is one that failed
+        is_leader = run is None or run.cancelled.is_set() or run.error is not None
+        if is_leader:
+            run = InFlightRun()
+            _runs[key] = run
+        subscription = run.subscribe()
+
+    if is_leader:
+        metrics.increment("single_flight", "runs")
+        # The run is driven outside any one request so a disconnecting leader
+        # doesn't cut off the duplicates attached to it; it is only cancelled
+        # once no subscriber is left.
+        threading.Thread(
+            target=_drive, args=(key, run, start), name="tutor-run", daemon=True
+        ).start()
+    else:
+        metrics.increment("single_flight", "coalesced")
+
+    return subscription
@@ -8,15 +8,21 @@ class TutorState(TypedDict):
     project_id: str
     conversation_history: List[Dict[str, Any]]
     highlighted_text: str
-    active_file_content: str
+    active_file: Dict[str, Any]  # Blob reference to the open note, if any
 
     # Query analysis
     query_type: str  # "SEARCH", "ADD_TO_NOTE", "GENERAL"
 
     # Search and retrieval
+    search_scope: str  # "project", "workspace"
+    search_project_ids: List[str]
     search_query: str
+    # Matched notes are stored as blob references plus their search metadata;
+    # note bodies live in the blob store so checkpoints stay small
     found_files: List[Dict[str, Any]]
-    file_contents: str
+    # Last SEARCH turn's terms and files; left out of each turn's input so it
+    # carries over between turns of a thread through the checkpointer
+    retrieval_cache: Dict[str, Any]
 
     # Note generation
     pending_note_edit: str
@@ -1,28 +1,200 @@
-from typing import Union
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from langchain_anthropic import ChatAnthropic
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableBinding
 from langchain_openai import ChatOpenAI
 
+from src.logic import metrics
+from src.logic.ai_tutor.providers import HedgedChatModel
+from src.logic.ai_tutor.run_control import get_run_control
 from src.settings import settings
 
+EPHEMERAL_CACHE_CONTROL = {"type": "ephemeral"}
+CANCEL_POLL_INTERVAL = 0.25
+
+
+def get_llm(is_mini: bool = True) -> Union[ChatOpenAI, ChatAnthropic, HedgedChatModel]:
+    providers = get_available_providers(is_mini)
+    if not providers:
+        raise ValueError(
+            "No API key provided. Please set at least one LLM provider's API key in your environment."
+        )
+
+    if settings.llm_provider_mode == "hedged" and len(providers) > 1:
+        return HedgedChatModel(providers=providers)
+    return providers[0][1]
+
+
+def get_available_providers(is_mini: bool = True) -> List[Tuple[str, BaseChatModel]]:
+    providers = []
 
-def get_llm(is_mini: bool = True) -> Union[ChatOpenAI, ChatAnthropic]:
     if settings.anthropic_api_key:
         model = (
             settings.anthropic_lite_model if is_mini else settings.anthropic_main_model
         )
-        return ChatAnthropic(
-            model=model,
-            api_key=settings.anthropic_api_key,
-            temperature=0.7,
+        extra_kwargs = {}
+        if settings.anthropic_base_url:
+            extra_kwargs["base_url"] = settings.anthropic_base_url
+        providers.append(
+            (
+                "anthropic",
+                ChatAnthropic(
+                    model=model,
+                    api_key=settings.anthropic_api_key,
+                    temperature=0.7,
+                    **extra_kwargs,
+                ),
+            )
         )
-    elif settings.openai_api_key:
+
+    if settings.openai_api_key:
         model = settings.openai_lite_model if is_mini else settings.openai_main_model
-        return ChatOpenAI(
-            model=model,
-            api_key=settings.openai_api_key,
-            temperature=0.7,
+        extra_kwargs = {}
+        if settings.openai_base_url:
+            extra_kwargs["base_url"] = settings.openai_base_url
+        providers.append(
+            (
+                "openai",
+                ChatOpenAI(
+                    model=model,
+                    api_key=settings.openai_api_key,
+                    temperature=0.7,
+                    stream_usage=True,
+                    **extra_kwargs,
+                ),
+            )
         )
-    raise ValueError(
-        "No API key provided. Please set at least one LLM provider's API key in your environment."
+
+    if settings.llm_primary_provider == "openai":
+        providers.sort(key=lambda provider: provider[0] != "openai")
+
+    return providers
+
+
+def supports_cache_control(llm: Runnable) -> bool:
+    # Models with bound tools are wrapped; the hints go to the model inside
+    while isinstance(llm, RunnableBinding):
+        llm = llm.bound
+    # Hedged models strip the hints for providers that don't understand them
+    return isinstance(llm, (ChatAnthropic, HedgedChatModel))
+
+
+def build_cached_messages(
+    llm: Runnable,
+    system_prompt: str,
+    cached_segments: List[str],
+    dynamic_prompt: str,
+) -> List[BaseMessage]:
+    # Stable segments go first so they form a prefix that providers can reuse
+    # across turns; providers with automatic prefix caching benefit from the
+    # ordering alone.
+    cached_segments = [segment for segment in cached_segments if segment]
+
+    if not supports_cache_control(llm):
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="\n\n".join(cached_segments + [dynamic_prompt])),
+        ]
+
+    user_blocks: List[Dict[str, Any]] = [
+        {"type": "text", "text": segment, "cache_control": EPHEMERAL_CACHE_CONTROL}
+        for segment in cached_segments
+    ]
+    user_blocks.append({"type": "text", "text": dynamic_prompt})
+
+    return [
+        SystemMessage(
+            content=[
+                {
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": EPHEMERAL_CACHE_CONTROL,
+                }
+            ]
+        ),
+        HumanMessage(content=user_blocks),
+    ]
+
+
+def _stream_llm(
+    llm: Runnable,
+    messages: List[BaseMessage],
+    events: queue.Queue,
+    stopped: threading.Event,
+) -> None:
+    try:
+        stream = llm.stream(messages)
+        try:
+            for chunk in stream:
+                if stopped.is_set():
+                    return
+                events.put(("chunk", chunk))
+        finally:
+            # Closing the stream drops the connection, which stops generation
+            stream.close()
+    except Exception as e:
+        events.put(("error", e))
+        return
+    events.put(("done", None))
+
+
+def invoke_llm(
+    llm: Runnable, messages: List[BaseMessage], timeout: Optional[float] = None
+) -> AIMessage:
+    # Streamed in the background so a cancelled run or a spent budget can walk
+    # away mid-generation instead of waiting for (and paying for) the rest
+    control = get_run_control()
+    if control is None and timeout is None:
+        return llm.invoke(messages)
+
+    events: queue.Queue = queue.Queue()
+    stopped = threading.Event()
+    threading.Thread(
+        target=_stream_llm, args=(llm, messages, events, stopped), daemon=True
+    ).start()
+
+    expires_at = time.monotonic() + timeout if timeout is not None else None
+    message = None
+    try:
+        while True:
+            wait = CANCEL_POLL_INTERVAL
+            if expires_at is not None:
+                wait = min(wait, expires_at - time.monotonic())
+                if wait <= 0:
+                    raise TimeoutError("LLM call ran out of its time budget")
+            try:
+                kind, payload = events.get(timeout=wait)
+            except queue.Empty:
+                kind, payload = None, None
+            if control is not None:
+                control.raise_if_cancelled()
+
+            if kind == "chunk":
+                message = payload if message is None else message + payload
+            elif kind == "error":
+                raise payload
+            elif kind == "done":
+                return message if message is not None else AIMessage(content="")
+    finally:
+        stopped.set()
+
+
+def record_token_usage(node_name: str, response: AIMessage) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+
+    details = usage.get("input_token_details") or {}
+    group = f"token_usage.{node_name}"
+    metrics.increment(group, "calls")
+    metrics.increment(group, "input_tokens", usage.get("input_tokens", 0))
+    metrics.increment(group, "output_tokens", usage.get("output_tokens", 0))
+    metrics.increment(group, "cache_read_tokens", details.get("cache_read", 0) or 0)
+    metrics.increment(
+        group, "cache_write_tokens", details.get("cache_creation", 0) or 0
     )
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from src.logic.projects_manager import get_content_hash
+from src.settings import settings
+
+BLOB_FOLDER_NAME = ".blobs"
+BLOB_CACHE_SIZE = 128
+
+BlobRef = Dict[str, Any]  # {"path": str, "hash": str, "span": [start, end]}
+
+
+def get_blob_path(content_hash: str) -> Path:
+    # Fan out on the first two hex characters to keep folders small
+    return settings.data_path / BLOB_FOLDER_NAME / content_hash[:2] / content_hash
+
+
+def put_blob(content: str) -> str:
+    content_hash = get_content_hash(content)
+    blob_path = get_blob_path(content_hash)
+
+    if blob_path.exists():
+        # Refresh the mtime so pruning only drops blobs nobody stores anymore
+        os.utime(blob_path)
+        return content_hash
+
+    blob_path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temp name since concurrent requests may store the same content
+    fd, temp_path = tempfile.mkstemp(
+        dir=blob_path.parent, prefix=f".{content_hash}.", suffix=".tmp"
+    )
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+    os.replace(temp_path, blob_path)
+    return content_hash
+
+
+def get_blob(content_hash: str) -> Optional[str]:
+    try:
+        return _read_blob(content_hash)
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=BLOB_CACHE_SIZE)
+def _read_blob(content_hash: str) -> str:
+    # Blobs never change once written, so cached reads can't go stale
+    with open(get_blob_path(content_hash), "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def make_ref(
+    path: str, content: str, span: Optional[Tuple[int, int]] = None
+) -> BlobRef:
+    start, end = span if span is not None else (0, len(content))
+    return {"path": path, "hash": put_blob(content), "span": [start, end]}
+
+
+def resolve_ref(ref: BlobRef) -> Optional[str]:
+    content = get_blob(ref["hash"])
+    if content is None:
+        return None
+    start, end = ref["span"]
+    return content[start:end]
+
+
+def prune_blobs(max_age_days: float) -> int:
+    blob_root = settings.data_path / BLOB_FOLDER_NAME
+    if not blob_root.exists():
+        return 0
+
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for blob_path in blob_root.glob("*/*"):
+        try:
+            if blob_path.stat().st_mtime < cutoff:
+                blob_path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
@@ -1,8 +1,8 @@
-import json
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from src.logic.json_codec import dumps, loads
 from src.logic.projects_manager import get_single_project
 from src.models import BaseFolderConfig
 from src.settings import settings
@@ -62,16 +62,17 @@ def load_base_folder_config() -> BaseFolderConfig:
     if not config_path.exists():
         initialize_config_file()
 
-    with open(config_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    with open(config_path, "rb") as f:
+        data = loads(f.read())
 
     return BaseFolderConfig(**data)
 
 
 def save_base_folder_config(config: BaseFolderConfig) -> None:
     config_path = get_config_path()
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config.model_dump(), f, indent=2, default=str)
+    # Compact on purpose; the file is rewritten on every active file switch
+    with open(config_path, "wb") as f:
+        f.write(dumps(config.model_dump()))
 
 
 def get_config_path() -> Path:
@@ -0,0 +1,32 @@
+import threading
+import traceback
+from typing import Callable, List
+
+from src.models import ChangeEvent
+
+Subscriber = Callable[[ChangeEvent], None]
+
+_subscribers: List[Subscriber] = []
+_subscribers_lock = threading.Lock()
+
+
+def subscribe(callback: Subscriber) -> None:
+    with _subscribers_lock:
+        _subscribers.append(callback)
+
+
+def unsubscribe(callback: Subscriber) -> None:
+    with _subscribers_lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+def publish(event: ChangeEvent) -> None:
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+
+    for callback in subscribers:
+        try:
+            callback(event)
+        except Exception:
+            print(traceback.format_exc())
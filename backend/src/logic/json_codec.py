@@ -0,0 +1,72 @@
+import json
+from datetime import date, datetime
+from pathlib import PurePath
+from typing import Any, Callable, Tuple
+
+from pydantic import BaseModel
+
+from src.settings import settings
+
+JSON_BACKENDS = ("orjson", "msgspec", "json")
+
+
+def _default(value: Any) -> Any:
+    # Types none of the backends encode on their own
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, PurePath):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _load_orjson() -> Tuple[Callable[[Any], bytes], Callable[[Any], Any]]:
+    import orjson
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=_default, option=option)
+
+    return dumps, orjson.loads
+
+
+def _load_msgspec() -> Tuple[Callable[[Any], bytes], Callable[[Any], Any]]:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+    decoder = msgspec.json.Decoder()
+    return encoder.encode, decoder.decode
+
+
+def _load_json() -> Tuple[Callable[[Any], bytes], Callable[[Any], Any]]:
+    def dumps(value: Any) -> bytes:
+        if isinstance(value, BaseModel):
+            # pydantic's own encoder beats stdlib json on a dumped model
+            return value.model_dump_json().encode("utf-8")
+        return json.dumps(
+            value, default=_default, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    return dumps, json.loads
+
+
+def _select_backend(preferred: str) -> Tuple[str, Callable, Callable]:
+    if preferred != "auto" and preferred not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {preferred}")
+
+    loaders = {"orjson": _load_orjson, "msgspec": _load_msgspec, "json": _load_json}
+    # An unavailable choice falls back instead of breaking startup
+    candidates = JSON_BACKENDS if preferred == "auto" else (preferred, "json")
+    for name in candidates:
+        try:
+            return name, *loaders[name]()
+        except ImportError:
+            continue
+    return "json", *_load_json()
+
+
+JSON_BACKEND, dumps, loads = _select_backend(settings.json_backend)
@@ -0,0 +1,31 @@
+import threading
+from collections import defaultdict
+from typing import Dict
+
+_counters: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+_counters_lock = threading.Lock()
+
+
+def increment(group: str, name: str, amount: float = 1) -> None:
+    with _counters_lock:
+        _counters[group][name] += amount
+
+
+def get_counters(group: str) -> Dict[str, float]:
+    with _counters_lock:
+        return dict(_counters.get(group, {}))
+
+
+def get_metrics_snapshot() -> Dict[str, Dict[str, float]]:
+    with _counters_lock:
+        return {group: dict(values) for group, values in _counters.items()}
+
+
+def set_value(group: str, name: str, value: float) -> None:
+    with _counters_lock:
+        _counters[group][name] = value
+
+
+def hit_rate(hits: float, misses: float) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
@@ -0,0 +1,236 @@
+import asyncio
+import io
+import queue
+import shutil
+import tarfile
+import tempfile
+import threading
+import traceback
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import PurePosixPath
+from typing import IO, Iterator, Optional, Set, Tuple
+
+from src.logic import events
+from src.logic.projects_manager import (
+    get_single_project,
+    sanitize_file_name,
+    write_file_atomically,
+)
+from src.models import ChangeEvent, ImportResult
+from src.settings import settings
+
+ARCHIVE_CONTENT_TYPES = {
+    "application/zip": "zip",
+    "application/x-zip-compressed": "zip",
+    "application/x-tar": "tar",
+    "application/gzip": "tar",
+    "application/x-gzip": "tar",
+    "application/x-compressed-tar": "tar",
+}
+STREAM_QUEUE_CHUNKS = 64
+FEED_RETRY_SECONDS = 0.01
+MAX_REPORTED_ERRORS = 100
+
+ArchiveEntry = Tuple[str, Optional[bytes]]  # None when the entry is too large
+
+# Shared by all imports, so concurrent uploads don't multiply the disk writers
+_write_pool = ThreadPoolExecutor(
+    max_workers=settings.import_workers, thread_name_prefix="note-import"
+)
+
+
+class ChunkStreamReader(io.RawIOBase):
+    # Blocking file object fed with request body chunks from the event loop;
+    # the bounded queue keeps only a few chunks in memory at a time
+    def __init__(self, max_chunks: int = STREAM_QUEUE_CHUNKS):
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(max_chunks)
+        self._buffer = memoryview(b"")
+        self._eof = False
+        self._abandoned = threading.Event()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and not self._eof:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer = memoryview(chunk)
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    async def feed(self, chunk: Optional[bytes]) -> None:
+        # Waits on the event loop while the reader catches up, so no worker
+        # thread is held; dropped once the reader stopped early, so the sender
+        # never hangs
+        while not self._abandoned.is_set():
+            try:
+                self._queue.put_nowait(chunk)
+                return
+            except queue.Full:
+                await asyncio.sleep(FEED_RETRY_SECONDS)
+
+    async def finish(self) -> None:
+        await self.feed(None)
+
+    def abandon(self) -> None:
+        self._abandoned.set()
+
+
+def get_archive_format(content_type: str) -> Optional[str]:
+    return ARCHIVE_CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+def iter_tar_entries(fileobj: IO[bytes]) -> Iterator[ArchiveEntry]:
+    # Stream mode reads members strictly in order, never seeking back
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            if member.size > settings.import_max_file_size:
+                yield member.name, None
+                continue
+            yield member.name, archive.extractfile(member).read()
+
+
+def iter_zip_entries(fileobj: IO[bytes]) -> Iterator[ArchiveEntry]:
+    # The zip index sits at the end of the archive, so it is spooled to disk
+    # (not memory) first
+    with tempfile.TemporaryFile() as spool:
+        shutil.copyfileobj(fileobj, spool)
+        spool.seek(0)
+        with zipfile.ZipFile(spool) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                if info.file_size > settings.import_max_file_size:
+                    yield info.filename, None
+                    continue
+                with archive.open(info) as member:
+                    data = member.read(settings.import_max_file_size + 1)
+                yield (
+                    info.filename,
+                    (data if len(data) <= settings.import_max_file_size else None),
+                )
+
+
+def import_archive(
+    project_id: str, fileobj: IO[bytes], archive_format: str, overwrite: bool = False
+) -> ImportResult:
+    project = get_single_project(project_id)
+    project_path = settings.data_path / project.path
+    result = ImportResult(project_id=project.id)
+    result_lock = threading.Lock()
+    claimed_names: Set[str] = set()
+    max_in_flight = settings.import_workers * 4
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def record(outcome: str, error: Optional[str] = None) -> None:
+        with result_lock:
+            setattr(result, outcome, getattr(result, outcome) + 1)
+            if error and len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(error)
+
+    def write_note(entry_name: str, file_name: str, data: bytes) -> None:
+        try:
+            content = data.decode("utf-8")
+            file_path = project_path / file_name
+            if overwrite:
+                write_file_atomically(file_path, content)
+            else:
+                with open(file_path, "x", encoding="utf-8") as f:
+                    f.write(content)
+            record("imported")
+        except FileExistsError:
+            record("skipped")
+        except UnicodeDecodeError:
+            record("failed", f"{entry_name}: not UTF-8 text")
+        except OSError as e:
+            record("failed", f"{entry_name}: {e}")
+        finally:
+            in_flight.release()
+
+    entries = iter_zip_entries if archive_format == "zip" else iter_tar_entries
+
+    # Per-file events would make every consumer react once per note; they get
+    # a single project-level notification once the batch is on disk instead.
+    events.publish(
+        ChangeEvent(
+            type="project_import_started", project_id=project.id, path=project.id
+        )
+    )
+    try:
+        try:
+            for entry_name, data in entries(fileobj):
+                file_name = get_import_file_name(entry_name, claimed_names)
+                if file_name is None:
+                    record("skipped")
+                    continue
+                if data is None:
+                    record("failed", f"{entry_name}: file is too large")
+                    continue
+
+                # Bounds how many read notes wait in memory for a writer
+                in_flight.acquire()
+                _write_pool.submit(write_note, entry_name, file_name, data)
+        finally:
+            # Each write hands its slot back when done, so taking every slot
+            # waits for the writes still running
+            for _ in range(max_in_flight):
+                in_flight.acquire()
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError) as e:
+        print(traceback.format_exc())
+        raise ValueError(f"Invalid {archive_format} archive: {e}")
+    finally:
+        events.publish(
+            ChangeEvent(type="project_imported", project_id=project.id, path=project.id)
+        )
+
+    return result
+
+
+async def run_import(
+    project_id: str, fileobj: IO[bytes], archive_format: str, overwrite: bool = False
+) -> ImportResult:
+    # The import waits on the upload for as long as it takes to arrive, so it
+    # gets a thread of its own instead of a storage worker the API routes need
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="note-import-read")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            executor,
+            partial(import_archive, project_id, fileobj, archive_format, overwrite),
+        )
+    finally:
+        executor.shutdown(wait=False)
+
+
+def get_import_file_name(entry_name: str, claimed_names: Set[str]) -> Optional[str]:
+    path = PurePosixPath(entry_name.replace("\\", "/"))
+    if not path.name.endswith(".md"):
+        return None
+    if any(part.startswith(".") or part == "__MACOSX" for part in path.parts):
+        return None
+
+    try:
+        file_name = sanitize_file_name(path.name)
+    except ValueError:
+        return None
+    if file_name.startswith("."):
+        return None
+
+    # Folders are flattened; same-named notes from different folders are kept
+    # side by side rather than overwriting each other
+    stem = file_name[: -len(".md")]
+    candidate, counter = file_name, 2
+    while candidate in claimed_names:
+        candidate = f"{stem} {counter}.md"
+        counter += 1
+    claimed_names.add(candidate)
+    return candidate
@@ -1,10 +1,28 @@
+import base64
+import binascii
+import hashlib
+import heapq
+import os
+import re
+import threading
 from datetime import datetime
 from pathlib import Path, PosixPath
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-from src.models import FileContent, Project
+from src.logic import events
+from src.logic.search.link_graph import link_graph_service, replace_link_targets
+from src.models import ChangeEvent, FileContent, NoteEditResult, Project
 from src.settings import settings
 
+HEADING_LINE_PATTERN = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+
+_file_locks: Dict[Path, threading.Lock] = {}
+_file_locks_lock = threading.Lock()
+
+
+class NoteVersionConflictError(ValueError):
+    pass
+
 
 def get_all_project_ids() -> List[str]:
     data_path = settings.data_path
@@ -16,32 +34,61 @@ def get_all_project_ids() -> List[str]:
 
 
 def get_all_projects() -> List[Project]:
-    data_path = settings.data_path
-    projects = []
-
-    for item in data_path.iterdir():
-        if not item.is_dir() or item.name.startswith("."):
-            continue
-
-        project = get_project_object_from_path(item)
-        projects.append(project)
-
+    projects, _, _ = list_projects()
     return projects
 
 
 def get_single_project(project_id: str) -> Optional[Project]:
     data_path = settings.data_path
     project_path_item = next(
-        item
-        for item in data_path.iterdir()
-        if item.is_dir() and item.name == project_id
+        (
+            item
+            for item in data_path.iterdir()
+            if item.is_dir() and item.name == project_id
+        ),
+        None,
     )
     if not project_path_item:
         raise ValueError(f"Project not found: {project_id}")
     return get_project_object_from_path(project_path_item)
 
 
-def get_project_object_from_path(path_item: PosixPath) -> Project:
+def list_projects(
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_files: bool = True,
+) -> Tuple[List[Project], Optional[str], int]:
+    data_path = settings.data_path
+    project_ids, next_cursor, total = get_name_page(
+        iter_project_ids(prefix), cursor, limit
+    )
+    projects = [
+        get_project_object_from_path(data_path / project_id, include_files)
+        for project_id in project_ids
+    ]
+    return projects, next_cursor, total
+
+
+def count_projects(prefix: str = "") -> int:
+    return sum(1 for _ in iter_project_ids(prefix))
+
+
+def iter_project_ids(prefix: str = "") -> Iterator[str]:
+    prefix = prefix.casefold()
+    with os.scandir(settings.data_path) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if prefix and not entry.name.casefold().startswith(prefix):
+                continue
+            if entry.is_dir():
+                yield entry.name
+
+
+def get_project_object_from_path(
+    path_item: PosixPath, include_files: bool = True
+) -> Project:
     if not path_item.is_dir():
         raise ValueError(
             f"Path {path_item.name} is not a directory, and can't be turned into a Project."
@@ -52,11 +99,19 @@ def get_project_object_from_path(path_item: PosixPath) -> Project:
     relative_path = str(path_item.relative_to(data_path))
     absolute_path = path_item.absolute()
 
+    if include_files:
+        file_names = get_project_file_names(absolute_path)
+        file_count = len(file_names)
+    else:
+        file_names = []
+        file_count = sum(1 for _ in iter_project_file_names(absolute_path))
+
     return Project(
         id=path_item.name,
         name=path_item.name,
         path=relative_path,
-        file_names=get_project_file_names(absolute_path),
+        file_names=file_names,
+        file_count=file_count,
         created=datetime.fromtimestamp(path_item.stat().st_ctime),
         modified=datetime.fromtimestamp(path_item.stat().st_mtime),
     )
@@ -81,15 +136,20 @@ def create_project(name: str) -> Project:
             f"# {safe_name}\n\nWelcome to your new project!\n\nStart writing your notes here.\n"
         )
 
+    file_names = get_project_file_names(project_path)
     project = Project(
         id=safe_name,
         name=safe_name,
         path=str(project_path.relative_to(data_path)),
-        file_names=get_project_file_names(project_path),
+        file_names=file_names,
+        file_count=len(file_names),
         created=datetime.now(),
         modified=datetime.now(),
     )
 
+    events.publish(
+        ChangeEvent(type="project_created", project_id=safe_name, path=project.path)
+    )
     return project
 
 
@@ -161,23 +221,141 @@ def save_file(file_path: str, content: str) -> bool:
     try:
         with open(full_path, "w", encoding="utf-8") as f:
             f.write(content)
-        return True
     except Exception:
         return False
 
+    relative_path = full_path.relative_to(data_path)
+    events.publish(
+        ChangeEvent(
+            type="file_saved",
+            project_id=relative_path.parts[0],
+            path=str(relative_path),
+        )
+    )
+    return True
+
+
+def insert_into_file(
+    file_path: str,
+    content: str,
+    mode: str = "append",
+    heading: Optional[str] = None,
+    offset: Optional[int] = None,
+    expected_hash: Optional[str] = None,
+) -> NoteEditResult:
+    data_path = settings.data_path
+
+    full_path = Path(file_path)
+    if not full_path.is_absolute():
+        full_path = data_path / file_path
+
+    try:
+        full_path.resolve().relative_to(data_path.resolve())
+    except ValueError:
+        raise ValueError("File path is outside allowed directory")
+
+    if not full_path.is_file():
+        raise FileNotFoundError(f"File does not exist: {file_path}")
+
+    with _get_file_lock(full_path):
+        with open(full_path, "r", encoding="utf-8") as f:
+            current = f.read()
+
+        if expected_hash is not None and expected_hash != get_content_hash(current):
+            raise NoteVersionConflictError(
+                f"File was modified since it was read: {file_path}"
+            )
+
+        insert_at = find_insert_offset(current, mode, heading, offset)
+        block = format_insert_block(current, insert_at, content)
+        updated = current[:insert_at] + block + current[insert_at:]
+        write_file_atomically(full_path, updated)
+
+    relative_path = full_path.relative_to(data_path)
+    events.publish(
+        ChangeEvent(
+            type="file_saved",
+            project_id=relative_path.parts[0],
+            path=str(relative_path),
+        )
+    )
+    return NoteEditResult(
+        path=str(relative_path),
+        offset=insert_at,
+        length=len(block),
+        hash=get_content_hash(updated),
+    )
+
+
+def find_insert_offset(
+    text: str, mode: str, heading: Optional[str] = None, offset: Optional[int] = None
+) -> int:
+    if mode == "append":
+        return len(text)
+
+    if mode == "offset":
+        if offset is None or not 0 <= offset <= len(text):
+            raise ValueError(f"Invalid insert offset: {offset}")
+        # Never split a line in half
+        line_end = text.find("\n", offset)
+        return len(text) if line_end == -1 else line_end + 1
+
+    if mode == "after_heading":
+        target = (heading or "").strip().lstrip("#").strip().lower()
+        headings = list(HEADING_LINE_PATTERN.finditer(text))
+        for index, match in enumerate(headings):
+            if match.group(2).strip().lower() != target:
+                continue
+            # Insert at the end of the section, before the next heading of the
+            # same or a higher level
+            level = len(match.group(1))
+            for next_match in headings[index + 1 :]:
+                if len(next_match.group(1)) <= level:
+                    return next_match.start()
+            return len(text)
+        raise ValueError(f"Heading not found: {heading}")
+
+    raise ValueError(f"Invalid insert mode: {mode}")
+
+
+def format_insert_block(text: str, insert_at: int, content: str) -> str:
+    before = text[:insert_at]
+    if not before or before.endswith("\n\n"):
+        lead = ""
+    elif before.endswith("\n"):
+        lead = "\n"
+    else:
+        lead = "\n\n"
+
+    block = lead + content.strip("\n") + "\n"
+    if insert_at < len(text):
+        block += "\n"
+    return block
+
+
+def write_file_atomically(full_path: Path, content: str) -> None:
+    # Hidden temp file in the same folder so listings and watchers ignore it
+    temp_path = full_path.with_name(f".{full_path.name}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, full_path)
+
+
+def _get_file_lock(full_path: Path) -> threading.Lock:
+    key = full_path.resolve()
+    with _file_locks_lock:
+        if key not in _file_locks:
+            _file_locks[key] = threading.Lock()
+        return _file_locks[key]
+
 
 def create_file(project_id: str, filename: str) -> FileContent:
     project = get_single_project(project_id)
     data_path = settings.data_path
 
-    if not filename.endswith(".md"):
-        filename += ".md"
-
-    safe_filename = "".join(
-        c for c in filename if c.isalnum() or c in (" ", "-", "_", ".")
-    ).strip()
-    if not safe_filename:
-        raise ValueError(f"Invalid filename: {filename}")
+    safe_filename = sanitize_file_name(filename)
 
     project_path = data_path / project.path
     file_path = project_path / safe_filename
@@ -192,6 +370,13 @@ def create_file(project_id: str, filename: str) -> FileContent:
 
     stat = file_path.stat()
 
+    events.publish(
+        ChangeEvent(
+            type="file_created",
+            project_id=project.id,
+            path=str(file_path.relative_to(data_path)),
+        )
+    )
     return FileContent(
         name=file_path.stem,
         path=str(file_path.relative_to(data_path)),
@@ -201,6 +386,18 @@ def create_file(project_id: str, filename: str) -> FileContent:
     )
 
 
+def sanitize_file_name(filename: str) -> str:
+    if not filename.endswith(".md"):
+        filename += ".md"
+
+    safe_filename = "".join(
+        c for c in filename if c.isalnum() or c in (" ", "-", "_", ".")
+    ).strip()
+    if not safe_filename:
+        raise ValueError(f"Invalid filename: {filename}")
+    return safe_filename
+
+
 def delete_file(project_id: str, file_id: str) -> bool:
     project = get_single_project(project_id)
     data_path = settings.data_path
@@ -216,10 +413,18 @@ def delete_file(project_id: str, file_id: str) -> bool:
 
     try:
         file_path.unlink()
-        return True
     except Exception:
         return False
 
+    events.publish(
+        ChangeEvent(
+            type="file_deleted",
+            project_id=project.id,
+            path=str(file_path.relative_to(data_path)),
+        )
+    )
+    return True
+
 
 def rename_file(project_id: str, old_file_id: str, new_file_id: str) -> FileContent:
     project = get_single_project(project_id)
@@ -242,11 +447,31 @@ def rename_file(project_id: str, old_file_id: str, new_file_id: str) -> FileCont
     if new_file_path.exists():
         raise ValueError(f"File already exists: {safe_new_filename}")
 
+    # Looked up before the move, while the graph still knows the old name
+    linking_files = link_graph_service.backlinks(project.id, old_file_id)
+
     try:
         old_file_path.rename(new_file_path)
     except Exception as e:
         raise ValueError(f"Failed to rename file: {str(e)}")
 
+    events.publish(
+        ChangeEvent(
+            type="file_renamed",
+            project_id=project.id,
+            path=str(new_file_path.relative_to(data_path)),
+            old_path=str(old_file_path.relative_to(data_path)),
+        )
+    )
+
+    # The renamed note itself may link to its own sections
+    update_links_to_renamed_file(
+        project_path,
+        [*linking_files, safe_new_filename],
+        old_file_id,
+        safe_new_filename,
+    )
+
     stat = new_file_path.stat()
 
     with open(new_file_path, "r", encoding="utf-8") as f:
@@ -261,6 +486,34 @@ def rename_file(project_id: str, old_file_id: str, new_file_id: str) -> FileCont
     )
 
 
+def update_links_to_renamed_file(
+    project_path: Path, file_ids: List[str], old_file_id: str, new_file_id: str
+) -> None:
+    data_path = settings.data_path
+
+    for file_id in dict.fromkeys(file_ids):
+        file_path = project_path / f"{file_id}.md"
+        with _get_file_lock(file_path):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+
+            text, replacements = replace_link_targets(text, old_file_id, new_file_id)
+            if not replacements:
+                continue
+            write_file_atomically(file_path, text)
+
+        events.publish(
+            ChangeEvent(
+                type="file_saved",
+                project_id=project_path.name,
+                path=str(file_path.relative_to(data_path)),
+            )
+        )
+
+
 def rename_project(project_id: str, new_name: str) -> Project:
     data_path = settings.data_path
     old_project_path = data_path / project_id
@@ -284,6 +537,14 @@ def rename_project(project_id: str, new_name: str) -> Project:
     except Exception as e:
         raise ValueError(f"Failed to rename project: {str(e)}")
 
+    events.publish(
+        ChangeEvent(
+            type="project_renamed",
+            project_id=safe_new_name,
+            path=safe_new_name,
+            old_path=project_id,
+        )
+    )
     return get_project_object_from_path(new_project_path)
 
 
@@ -298,25 +559,102 @@ def delete_project(project_id: str) -> bool:
         import shutil
 
         shutil.rmtree(project_path)
-        return True
     except Exception:
         return False
 
+    events.publish(
+        ChangeEvent(type="project_deleted", project_id=project_id, path=project_id)
+    )
+    return True
+
 
 def get_project_file_names(directory: Path) -> List[str]:
-    file_names = []
+    return sorted(iter_project_file_names(directory))
 
-    try:
-        for item in directory.iterdir():
-            if item.name.startswith("."):
-                continue
 
-            if not (item.is_file() and item.name.endswith(".md")):
-                continue
+def list_project_file_names(
+    project_id: str,
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[str], Optional[str], int]:
+    return get_name_page(
+        iter_project_file_names(get_project_path(project_id), prefix), cursor, limit
+    )
+
+
+def count_project_file_names(project_id: str, prefix: str = "") -> int:
+    return sum(1 for _ in iter_project_file_names(get_project_path(project_id), prefix))
+
 
-            file_id = item.stem
-            file_names.append(file_id)
+def iter_project_file_names(directory: Path, prefix: str = "") -> Iterator[str]:
+    # Streams names straight from scandir; nothing is collected or sorted here
+    prefix = prefix.casefold()
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.name.endswith(".md"):
+                    continue
+                file_id = entry.name[: -len(".md")]
+                if prefix and not file_id.casefold().startswith(prefix):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                yield file_id
     except PermissionError:
-        pass
+        return
+
+
+def get_project_path(project_id: str) -> Path:
+    # Cheap existence check that doesn't enumerate the project's files
+    project_path = settings.data_path / project_id
+    if (
+        not project_id
+        or project_id.startswith(".")
+        or "/" in project_id
+        or not project_path.is_dir()
+    ):
+        raise ValueError(f"Project not found: {project_id}")
+    return project_path
+
+
+def get_name_page(
+    names: Iterable[str], cursor: Optional[str], limit: Optional[int]
+) -> Tuple[List[str], Optional[str], int]:
+    # One pass over the names keeps only the next `limit` of them in a heap,
+    # so memory stays bounded by the page size however large the folder is
+    after = decode_cursor(cursor) if cursor else None
+    total = 0
+
+    def remaining() -> Iterator[str]:
+        nonlocal total
+        for name in names:
+            total += 1
+            if after is None or name > after:
+                yield name
+
+    if limit is None:
+        page = sorted(remaining())
+        return page, None, total
+
+    page = heapq.nsmallest(limit + 1, remaining())
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor, total
+
+
+def encode_cursor(name: str) -> str:
+    return base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
 
-    return sorted(file_names)
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
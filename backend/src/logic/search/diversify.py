@@ -0,0 +1,107 @@
+import heapq
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from src.logic import metrics
+from src.logic.projects_manager import get_content_hash
+from src.logic.search.tokenizer import tokenize
+
+SHINGLE_SIZE = 3
+SKETCH_SIZE = 128
+NEAR_DUPLICATE_SIMILARITY = 0.8
+MMR_RELEVANCE_WEIGHT = 0.7
+SIGNATURE_CACHE_SIZE = 2048
+
+Signature = Tuple[int, ...]
+
+_signature_cache: "OrderedDict[str, Signature]" = OrderedDict()
+_signature_cache_lock = threading.Lock()
+
+
+def get_minhash_signature(content: str) -> Signature:
+    # Bottom-k MinHash: one hash per shingle and the k smallest kept, which
+    # estimates Jaccard similarity as well as k permutations at 1/k the cost
+    content_hash = get_content_hash(content)
+    with _signature_cache_lock:
+        signature = _signature_cache.get(content_hash)
+        if signature is not None:
+            _signature_cache.move_to_end(content_hash)
+            return signature
+
+    tokens = tokenize(content)
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = set(tokens)
+    else:
+        shingles = {
+            " ".join(tokens[i : i + SHINGLE_SIZE])
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        }
+    signature = tuple(
+        sorted(
+            heapq.nsmallest(
+                SKETCH_SIZE, {zlib.crc32(s.encode("utf-8")) for s in shingles}
+            )
+        )
+    )
+
+    with _signature_cache_lock:
+        _signature_cache[content_hash] = signature
+        while len(_signature_cache) > SIGNATURE_CACHE_SIZE:
+            _signature_cache.popitem(last=False)
+    return signature
+
+
+def estimate_similarity(first: Signature, second: Signature) -> float:
+    if not first or not second:
+        return 1.0 if first == second else 0.0
+
+    union_sketch = heapq.nsmallest(SKETCH_SIZE, set(first) | set(second))
+    shared = set(first) & set(second)
+    return sum(1 for value in union_sketch if value in shared) / len(union_sketch)
+
+
+def select_diverse(
+    found_files: List[Dict[str, Any]], top_k: int
+) -> List[Dict[str, Any]]:
+    if not found_files:
+        return []
+
+    candidates = sorted(found_files, key=lambda x: x["relevance"], reverse=True)
+    signatures = [get_minhash_signature(c["content"]) for c in candidates]
+    max_relevance = candidates[0]["relevance"] or 1.0
+
+    # Near-duplicates of a more relevant note add tokens but no information
+    kept: List[int] = []
+    for index in range(len(candidates)):
+        if all(
+            estimate_similarity(signatures[index], signatures[other])
+            < NEAR_DUPLICATE_SIMILARITY
+            for other in kept
+        ):
+            kept.append(index)
+    dropped = len(candidates) - len(kept)
+    if dropped:
+        metrics.increment("retrieval", "near_duplicates_dropped", dropped)
+
+    # Maximal marginal relevance over what's left
+    selected: List[int] = []
+    max_similarity = {index: 0.0 for index in kept}
+    while max_similarity and len(selected) < top_k:
+        best = max(
+            max_similarity,
+            key=lambda i: (
+                MMR_RELEVANCE_WEIGHT * candidates[i]["relevance"] / max_relevance
+                - (1 - MMR_RELEVANCE_WEIGHT) * max_similarity[i]
+            ),
+        )
+        selected.append(best)
+        del max_similarity[best]
+        for index in max_similarity:
+            max_similarity[index] = max(
+                max_similarity[index],
+                estimate_similarity(signatures[index], signatures[best]),
+            )
+
+    return [candidates[index] for index in selected]
@@ -0,0 +1,309 @@
+import multiprocessing
+import os
+import queue
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from src.logic import events
+from src.logic.json_codec import dumps, loads
+from src.logic.projects_manager import get_all_project_ids
+from src.logic.search.scanner import list_note_paths, map_scan_tasks
+from src.logic.search.tokenizer import index_note_file, read_note_text, tokenize
+from src.models import ChangeEvent, IndexStatus, ShardHit, ShardResult
+from src.settings import settings
+
+INDEX_FOLDER_NAME = ".index"
+INDEX_FORMAT_VERSION = 1
+INDEX_CHECKPOINT_BATCH = 64
+
+
+def get_index_path(project_id: str) -> Path:
+    return settings.data_path / INDEX_FOLDER_NAME / f"{project_id}.json"
+
+
+def load_index_file(project_id: str) -> Dict[str, Dict[str, Any]]:
+    index_path = get_index_path(project_id)
+    if not index_path.exists():
+        return {}
+
+    try:
+        with open(index_path, "rb") as f:
+            data = loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+    if data.get("version") != INDEX_FORMAT_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_index_file(project_id: str, files: Dict[str, Dict[str, Any]]) -> None:
+    index_path = get_index_path(project_id)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = index_path.with_suffix(".tmp")
+    with open(temp_path, "wb") as f:
+        f.write(dumps({"version": INDEX_FORMAT_VERSION, "files": files}))
+    os.replace(temp_path, index_path)
+
+
+def delete_index_file(project_id: str) -> None:
+    get_index_path(project_id).unlink(missing_ok=True)
+
+
+class ProjectIndex:
+    def __init__(self, project_id: str, files: Dict[str, Dict[str, Any]]):
+        self.project_id = project_id
+        self.files = files
+        self._postings: Dict[str, Set[str]] = {}
+        for file_name, entry in files.items():
+            for token in entry["tokens"]:
+                self._postings.setdefault(token, set()).add(file_name)
+        self._vocabulary = list(self._postings)
+
+    def candidates_for_term(self, term: str) -> Set[str]:
+        term_tokens = tokenize(term)
+        if not term_tokens:
+            return set(self.files)
+
+        # Keywords match as substrings, so a term token can hit any indexed
+        # token containing it; the final check against the text stays exact.
+        candidates: Optional[Set[str]] = None
+        for term_token in term_tokens:
+            matching_files: Set[str] = set()
+            for token in self._vocabulary:
+                if term_token in token:
+                    matching_files |= self._postings[token]
+            candidates = (
+                matching_files if candidates is None else candidates & matching_files
+            )
+            if not candidates:
+                break
+        return candidates or set()
+
+    def search(self, search_terms: List[str]) -> ShardResult:
+        terms = list(dict.fromkeys(term for term in search_terms if term))
+        term_candidates = {term: self.candidates_for_term(term) for term in terms}
+        candidates = sorted(set().union(*term_candidates.values()))
+
+        data_path = settings.data_path
+        project_path = data_path / self.project_id
+
+        def verify(file_name: str):
+            content = read_note_text(project_path / file_name)
+            if content is None:
+                return file_name, None, []
+            content_lower = content.lower()
+            matched_terms = [
+                term
+                for term in terms
+                if file_name in term_candidates[term] and term in content_lower
+            ]
+            return file_name, content, matched_terms
+
+        document_frequencies = {term: 0 for term in terms}
+        hits = []
+        for file_name, content, matched_terms in map_scan_tasks(verify, candidates):
+            if not matched_terms:
+                continue
+            for term in matched_terms:
+                document_frequencies[term] += 1
+            hits.append(
+                ShardHit(
+                    project=self.project_id,
+                    file=Path(file_name).stem,
+                    path=str((project_path / file_name).relative_to(data_path)),
+                    content=content,
+                    matched_terms=matched_terms,
+                )
+            )
+
+        return ShardResult(
+            project_id=self.project_id,
+            document_count=len(self.files),
+            document_frequencies=document_frequencies,
+            hits=hits,
+        )
+
+
+class IndexingService:
+    def __init__(self):
+        self._statuses: Dict[str, IndexStatus] = {}
+        self._indexes: Dict[str, ProjectIndex] = {}
+        self._dirty: Set[str] = set()
+        self._queued: Set[str] = set()
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        # Spawned workers avoid forking a process that already runs threads
+        self._pool = ProcessPoolExecutor(
+            max_workers=settings.index_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        events.subscribe(self._on_change)
+        for project_id in get_all_project_ids():
+            self.enqueue(project_id)
+
+        self._thread = threading.Thread(
+            target=self._run, name="note-indexer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        events.unsubscribe(self._on_change)
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._pool.shutdown(cancel_futures=True)
+        self._pool = None
+
+    def enqueue(self, project_id: str) -> None:
+        with self._lock:
+            status = self._statuses.get(project_id)
+            if status is None:
+                self._statuses[project_id] = IndexStatus(
+                    project_id=project_id, state="pending"
+                )
+            elif status.state == "ready":
+                status.state = "stale"
+            self._dirty.add(project_id)
+            if project_id in self._queued:
+                return
+            self._queued.add(project_id)
+        self._queue.put(project_id)
+
+    def remove(self, project_id: str) -> None:
+        with self._lock:
+            self._statuses.pop(project_id, None)
+            self._indexes.pop(project_id, None)
+            self._dirty.discard(project_id)
+        delete_index_file(project_id)
+
+    def get_ready_index(self, project_id: str) -> Optional[ProjectIndex]:
+        with self._lock:
+            status = self._statuses.get(project_id)
+            if status is None or status.state != "ready":
+                return None
+            return self._indexes.get(project_id)
+
+    def get_statuses(self) -> List[IndexStatus]:
+        with self._lock:
+            return [status.model_copy() for _, status in sorted(self._statuses.items())]
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        if event.type == "project_import_started":
+            return  # Indexed once, when the whole batch has landed
+        if event.type == "project_deleted":
+            self.remove(event.project_id)
+        elif event.type == "project_renamed":
+            self.remove(event.old_path)
+            self.enqueue(event.project_id)
+        else:
+            self.enqueue(event.project_id)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            project_id = self._queue.get()
+            if project_id is None:
+                continue
+
+            with self._lock:
+                self._queued.discard(project_id)
+                if project_id not in self._statuses:
+                    continue  # Removed while queued
+            try:
+                self._index_project(project_id)
+            except Exception:
+                print(traceback.format_exc())
+                self._set_status(project_id, state="error")
+
+    def _set_status(self, project_id: str, **updates: Any) -> None:
+        with self._lock:
+            status = self._statuses.get(project_id)
+            if status is None:
+                return
+            for key, value in updates.items():
+                setattr(status, key, value)
+            status.updated = datetime.now()
+
+    def _index_project(self, project_id: str) -> None:
+        with self._lock:
+            self._dirty.discard(project_id)
+
+        project_path = settings.data_path / project_id
+        if not project_path.is_dir():
+            self.remove(project_id)
+            return
+
+        note_paths = list_note_paths(project_path)
+        existing = load_index_file(project_id)
+
+        # Entries from a previous (possibly interrupted) run are reused as long
+        # as the file hasn't changed since, so restarts resume where they left off.
+        files: Dict[str, Dict[str, Any]] = {}
+        to_index: List[Path] = []
+        for path in note_paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entry = existing.get(path.name)
+            if (
+                entry is not None
+                and entry["mtime"] == stat.st_mtime
+                and entry["size"] == stat.st_size
+            ):
+                files[path.name] = entry
+            else:
+                to_index.append(path)
+
+        self._set_status(
+            project_id,
+            state="indexing",
+            indexed_files=len(files),
+            total_files=len(files) + len(to_index),
+        )
+
+        for start in range(0, len(to_index), INDEX_CHECKPOINT_BATCH):
+            if self._stop.is_set():
+                return
+
+            batch = to_index[start : start + INDEX_CHECKPOINT_BATCH]
+            entries = self._pool.map(index_note_file, [str(path) for path in batch])
+            for path, entry in zip(batch, entries):
+                if entry is not None:
+                    files[path.name] = entry
+
+            save_index_file(project_id, files)
+            self._set_status(project_id, indexed_files=len(files))
+
+        if not to_index and len(existing) != len(files):
+            save_index_file(project_id, files)  # Drop entries for removed notes
+
+        project_index = ProjectIndex(project_id, files)
+        with self._lock:
+            if project_id not in self._statuses:
+                return
+            self._indexes[project_id] = project_index
+            # Changes that arrived mid-run have already re-queued the project
+            state = "stale" if project_id in self._dirty else "ready"
+        self._set_status(project_id, state=state, indexed_files=len(files))
+
+
+indexing_service = IndexingService()
@@ -0,0 +1,316 @@
+import re
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from src.logic import events
+from src.logic.search.scanner import list_note_paths, map_scan_tasks
+from src.logic.search.tokenizer import read_note_text
+from src.models import ChangeEvent
+from src.settings import settings
+
+# Linked notes score this fraction of the best hit that links to them
+LINK_SCORE_DECAY = 0.5
+
+# [[target]], [[target#heading]], [[target|alias]]
+WIKILINK_PATTERN = re.compile(
+    r"\[\[([^\]\[|#\n]+)((?:#[^\]\[|\n]*)?(?:\|[^\]\[\n]*)?)\]\]"
+)
+# [text](target.md) and [text](target.md#heading), relative links only
+MARKDOWN_LINK_PATTERN = re.compile(
+    r"(\[[^\]\n]*\]\()(?!\w+://)([^)\s#]+?\.md)((?:#[^)\s]*)?\))"
+)
+
+
+def get_link_key(name: str) -> str:
+    # Links resolve case-insensitively, like most markdown note tools
+    return name.strip().casefold()
+
+
+def get_wikilink_target(target: str) -> str:
+    name = target.strip().rsplit("/", 1)[-1]
+    return name[:-3] if name.endswith(".md") else name
+
+
+def get_markdown_link_target(target: str) -> str:
+    return Path(unquote(target)).stem
+
+
+def extract_links(text: str) -> List[str]:
+    targets = [get_wikilink_target(m.group(1)) for m in WIKILINK_PATTERN.finditer(text)]
+    targets.extend(
+        get_markdown_link_target(m.group(2))
+        for m in MARKDOWN_LINK_PATTERN.finditer(text)
+    )
+    return [target for target in targets if target]
+
+
+def replace_link_targets(text: str, old_name: str, new_name: str) -> Tuple[str, int]:
+    old_key = get_link_key(old_name)
+    replacements = 0
+
+    def replace_wikilink(match: re.Match) -> str:
+        nonlocal replacements
+        if get_link_key(get_wikilink_target(match.group(1))) != old_key:
+            return match.group(0)
+        replacements += 1
+        return f"[[{new_name}{match.group(2)}]]"
+
+    def replace_markdown_link(match: re.Match) -> str:
+        nonlocal replacements
+        target = match.group(2)
+        if get_link_key(get_markdown_link_target(target)) != old_key:
+            return match.group(0)
+        replacements += 1
+        folder = target.rsplit("/", 1)[0] + "/" if "/" in target else ""
+        return f"{match.group(1)}{folder}{quote(new_name)}.md{match.group(3)}"
+
+    text = WIKILINK_PATTERN.sub(replace_wikilink, text)
+    text = MARKDOWN_LINK_PATTERN.sub(replace_markdown_link, text)
+    return text, replacements
+
+
+class LinkGraph:
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        # Per-note adjacency is the incrementally maintained source of truth;
+        # queries run against CSR arrays rebuilt from it only after changes.
+        self._outgoing: Dict[str, List[str]] = {}
+        self._names: Dict[str, str] = {}
+        self._node_keys: List[str] = []
+        self._node_ids: Dict[str, int] = {}
+        self._out_offsets = array("l")
+        self._out_targets = array("l")
+        self._in_offsets = array("l")
+        self._in_sources = array("l")
+        self._csr_dirty = True
+
+    def set_links(self, file_name: str, targets: List[str]) -> None:
+        key = get_link_key(file_name)
+        self._names[key] = file_name
+        self._outgoing[key] = [
+            target_key
+            for target_key in dict.fromkeys(get_link_key(t) for t in targets)
+            if target_key != key
+        ]
+        self._csr_dirty = True
+
+    def remove_note(self, file_name: str) -> None:
+        key = get_link_key(file_name)
+        self._names.pop(key, None)
+        self._outgoing.pop(key, None)
+        self._csr_dirty = True
+
+    def rename_note(self, old_file_name: str, new_file_name: str) -> None:
+        # Links pointing at the old name stay until their notes are rewritten
+        targets = self._outgoing.pop(get_link_key(old_file_name), [])
+        self._names.pop(get_link_key(old_file_name), None)
+        new_key = get_link_key(new_file_name)
+        self._names[new_key] = new_file_name
+        self._outgoing[new_key] = [t for t in targets if t != new_key]
+        self._csr_dirty = True
+
+    def neighbors(self, file_name: str) -> List[str]:
+        self._ensure_csr()
+        node_id = self._node_ids.get(get_link_key(file_name))
+        if node_id is None:
+            return []
+
+        neighbor_ids = set(
+            self._out_targets[
+                self._out_offsets[node_id] : self._out_offsets[node_id + 1]
+            ]
+        )
+        neighbor_ids.update(
+            self._in_sources[self._in_offsets[node_id] : self._in_offsets[node_id + 1]]
+        )
+        # Dangling links (to notes that don't exist) are not neighbors
+        return sorted(
+            self._names[self._node_keys[i]]
+            for i in neighbor_ids
+            if self._node_keys[i] in self._names
+        )
+
+    def backlinks(self, file_name: str) -> List[str]:
+        self._ensure_csr()
+        node_id = self._node_ids.get(get_link_key(file_name))
+        if node_id is None:
+            return []
+
+        return sorted(
+            self._names[self._node_keys[i]]
+            for i in self._in_sources[
+                self._in_offsets[node_id] : self._in_offsets[node_id + 1]
+            ]
+        )
+
+    def _ensure_csr(self) -> None:
+        if not self._csr_dirty:
+            return
+
+        node_keys = list(self._outgoing)
+        node_ids = {key: index for index, key in enumerate(node_keys)}
+        for targets in self._outgoing.values():
+            for target in targets:
+                if target not in node_ids:
+                    node_ids[target] = len(node_keys)
+                    node_keys.append(target)
+
+        node_count = len(node_keys)
+        out_offsets = array("l", [0])
+        out_targets = array("l")
+        in_degrees = [0] * node_count
+        for key in node_keys:
+            for target in self._outgoing.get(key, ()):
+                target_id = node_ids[target]
+                out_targets.append(target_id)
+                in_degrees[target_id] += 1
+            out_offsets.append(len(out_targets))
+
+        # Reverse edges via a counting sort over target ids
+        in_offsets = array("l", [0] * (node_count + 1))
+        for node_id, degree in enumerate(in_degrees):
+            in_offsets[node_id + 1] = in_offsets[node_id] + degree
+        in_sources = array("l", [0] * len(out_targets))
+        cursor = array("l", in_offsets[:-1])
+        for source_id in range(node_count):
+            for edge in range(out_offsets[source_id], out_offsets[source_id + 1]):
+                target_id = out_targets[edge]
+                in_sources[cursor[target_id]] = source_id
+                cursor[target_id] += 1
+
+        self._node_keys = node_keys
+        self._node_ids = node_ids
+        self._out_offsets = out_offsets
+        self._out_targets = out_targets
+        self._in_offsets = in_offsets
+        self._in_sources = in_sources
+        self._csr_dirty = False
+
+
+class LinkGraphService:
+    def __init__(self):
+        self._graphs: Dict[str, LinkGraph] = {}
+        self._building: Dict[str, List[ChangeEvent]] = {}
+        self._lock = threading.Lock()
+
+    def neighbors(self, project_id: str, file_name: str) -> List[str]:
+        graph = self._get_graph(project_id)
+        with self._lock:
+            return graph.neighbors(file_name)
+
+    def backlinks(self, project_id: str, file_name: str) -> List[str]:
+        graph = self._get_graph(project_id)
+        with self._lock:
+            return graph.backlinks(file_name)
+
+    def _get_graph(self, project_id: str) -> LinkGraph:
+        with self._lock:
+            graph = self._graphs.get(project_id)
+            if graph is not None:
+                return graph
+            # Changes during the scan are replayed once it finishes
+            self._building.setdefault(project_id, [])
+
+        project_path = settings.data_path / project_id
+        if not project_path.is_dir():
+            with self._lock:
+                self._building.pop(project_id, None)
+            raise ValueError(f"Project not found: {project_id}")
+
+        def read_links(path: Path) -> Tuple[str, Optional[List[str]]]:
+            content = read_note_text(path)
+            return path.stem, None if content is None else extract_links(content)
+
+        graph = LinkGraph(project_id)
+        for file_name, targets in map_scan_tasks(
+            read_links, list_note_paths(project_path)
+        ):
+            if targets is not None:
+                graph.set_links(file_name, targets)
+
+        with self._lock:
+            for event in self._building.pop(project_id, []):
+                self._apply(graph, event)
+            return self._graphs.setdefault(project_id, graph)
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        if event.type.startswith("project_"):
+            with self._lock:
+                for path in (event.path, event.old_path):
+                    if path:
+                        self._graphs.pop(path, None)
+            return
+
+        with self._lock:
+            if event.project_id in self._building:
+                self._building[event.project_id].append(event)
+                return
+            graph = self._graphs.get(event.project_id)
+            if graph is not None:
+                self._apply(graph, event)
+
+    def _apply(self, graph: LinkGraph, event: ChangeEvent) -> None:
+        if not event.path or not event.path.endswith(".md"):
+            return
+
+        path = Path(event.path)
+        if event.type == "file_deleted":
+            graph.remove_note(path.stem)
+        elif event.type == "file_renamed" and event.old_path:
+            graph.rename_note(Path(event.old_path).stem, path.stem)
+        else:
+            # One note per save, so reading it under the lock stays cheap
+            content = read_note_text(settings.data_path / path)
+            if content is None:
+                graph.remove_note(path.stem)
+            else:
+                graph.set_links(path.stem, extract_links(content))
+
+
+link_graph_service = LinkGraphService()
+events.subscribe(link_graph_service._on_change)
+
+
+def expand_with_linked_notes(
+    found_files: List[Dict[str, Any]], max_linked_files: int
+) -> List[Dict[str, Any]]:
+    data_path = settings.data_path
+    seen = {(file_info["project"], file_info["file"]) for file_info in found_files}
+
+    linked_scores: Dict[Tuple[str, str], float] = {}
+    for file_info in found_files:
+        try:
+            neighbors = link_graph_service.neighbors(
+                file_info["project"], file_info["file"]
+            )
+        except ValueError:
+            continue
+        score = round(file_info["relevance"] * LINK_SCORE_DECAY, 4)
+        for neighbor in neighbors:
+            key = (file_info["project"], neighbor)
+            if key not in seen and score > linked_scores.get(key, 0):
+                linked_scores[key] = score
+
+    best_linked = sorted(linked_scores.items(), key=lambda item: -item[1])
+    linked_files = []
+    for (project_id, file_name), score in best_linked[:max_linked_files]:
+        note_path = data_path / project_id / f"{file_name}.md"
+        content = read_note_text(note_path)
+        if content is None:
+            continue
+        linked_files.append(
+            {
+                "project": project_id,
+                "file": file_name,
+                "path": str(note_path.relative_to(data_path)),
+                "content": content,
+                "relevance": score,
+            }
+        )
+
+    expanded = found_files + linked_files
+    expanded.sort(key=lambda x: x["relevance"], reverse=True)
+    return expanded
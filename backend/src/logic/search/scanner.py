@@ -0,0 +1,162 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from src.logic.search.tokenizer import read_note_text
+from src.models import ShardHit, ShardResult
+from src.settings import settings
+
+# Below this many keywords CPython's C-level substring search beats walking an
+# automaton character by character in Python.
+AHO_CORASICK_MIN_TERMS = 16
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_scan_pool = ThreadPoolExecutor(
+    max_workers=settings.scan_workers, thread_name_prefix="note-scan"
+)
+
+
+class AhoCorasickAutomaton:
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [0]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(0)
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state] |= 1 << index
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[str]:
+        goto, fail, output = self._goto, self._fail, self._output
+        all_found = (1 << len(self.patterns)) - 1
+        state = 0
+        found = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+                if found == all_found:
+                    break
+
+        return {
+            pattern
+            for index, pattern in enumerate(self.patterns)
+            if found & (1 << index)
+        }
+
+
+class KeywordMatcher:
+    def __init__(self, terms: List[str]):
+        self.terms = list(dict.fromkeys(term for term in terms if term))
+        self._automaton: Optional[AhoCorasickAutomaton] = None
+        if len(self.terms) >= AHO_CORASICK_MIN_TERMS:
+            self._automaton = AhoCorasickAutomaton(self.terms)
+
+    def find(self, text: str) -> List[str]:
+        if self._automaton is None:
+            return [term for term in self.terms if term in text]
+
+        found = self._automaton.find(text)
+        return [term for term in self.terms if term in found]
+
+
+def list_note_paths(project_path: Path) -> List[Path]:
+    try:
+        with os.scandir(project_path) as entries:
+            note_paths = [
+                Path(entry.path)
+                for entry in entries
+                if entry.name.endswith(".md")
+                and not entry.name.startswith(".")
+                and entry.is_file()
+            ]
+    except PermissionError:
+        return []
+    return sorted(note_paths)
+
+
+def map_scan_tasks(function: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+    return _scan_pool.map(function, items)
+
+
+def scan_project(project_id: str, search_terms: List[str]) -> ShardResult:
+    data_path = settings.data_path
+    project_path = data_path / project_id
+    if not project_path.is_dir():
+        raise ValueError(f"Project not found: {project_id}")
+
+    matcher = KeywordMatcher(search_terms)
+
+    def scan_note(path: Path) -> Optional[Tuple[Path, str, List[str]]]:
+        content = read_note_text(path)
+        if content is None:
+            return None
+        return path, content, matcher.find(content.lower())
+
+    document_frequencies = {term: 0 for term in matcher.terms}
+    hits = []
+    document_count = 0
+
+    for scanned in _scan_pool.map(scan_note, list_note_paths(project_path)):
+        if scanned is None:
+            continue
+
+        document_count += 1
+        path, content, matched_terms = scanned
+        if not matched_terms:
+            continue
+
+        for term in matched_terms:
+            document_frequencies[term] += 1
+        hits.append(
+            ShardHit(
+                project=project_id,
+                file=path.stem,
+                path=str(path.relative_to(data_path)),
+                content=content,
+                matched_terms=matched_terms,
+            )
+        )
+
+    return ShardResult(
+        project_id=project_id,
+        document_count=document_count,
+        document_frequencies=document_frequencies,
+        hits=hits,
+    )
@@ -0,0 +1,75 @@
+import math
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from src.logic.search.indexer import indexing_service
+from src.logic.search.scanner import scan_project
+from src.models import ShardResult
+from src.settings import settings
+
+_shard_pool = ThreadPoolExecutor(
+    max_workers=settings.search_shard_workers, thread_name_prefix="search-shard"
+)
+
+
+def search_shard(project_id: str, search_terms: List[str]) -> ShardResult:
+    project_index = indexing_service.get_ready_index(project_id)
+    if project_index is not None:
+        return project_index.search(search_terms)
+
+    # No usable index yet (fresh import, indexing in progress or stale)
+    return scan_project(project_id, search_terms)
+
+
+def merge_shard_results(
+    shard_results: List[ShardResult], top_k: int
+) -> List[Dict[str, Any]]:
+    # Shards only report raw term statistics; IDF is computed over the union of
+    # all shards so scores from different projects are directly comparable.
+    document_count = sum(result.document_count for result in shard_results)
+    document_frequencies: Dict[str, int] = {}
+    for result in shard_results:
+        for term, frequency in result.document_frequencies.items():
+            document_frequencies[term] = document_frequencies.get(term, 0) + frequency
+
+    def idf(term: str) -> float:
+        return math.log((document_count + 1) / (document_frequencies[term] + 1)) + 1
+
+    found_files = []
+    for result in shard_results:
+        for hit in result.hits:
+            found_files.append(
+                {
+                    "project": hit.project,
+                    "file": hit.file,
+                    "path": hit.path,
+                    "content": hit.content,
+                    "relevance": round(sum(idf(t) for t in hit.matched_terms), 4),
+                }
+            )
+
+    found_files.sort(key=lambda x: x["relevance"], reverse=True)
+    return found_files[:top_k]
+
+
+def search_projects(
+    project_ids: List[str], search_terms: List[str], top_k: int
+) -> List[Dict[str, Any]]:
+    if len(project_ids) == 1:
+        return merge_shard_results([search_shard(project_ids[0], search_terms)], top_k)
+
+    futures = [
+        _shard_pool.submit(search_shard, project_id, search_terms)
+        for project_id in project_ids
+    ]
+
+    shard_results = []
+    for future in futures:
+        try:
+            shard_results.append(future.result())
+        except Exception:
+            # A missing or unreadable project shouldn't sink the whole search
+            print(traceback.format_exc())
+
+    return merge_shard_results(shard_results, top_k)
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Kept free of app imports so process-pool workers start quickly
+
+TOKEN_PATTERN = re.compile(r"\w+")
+HEADING_PATTERN = re.compile(r"^#{1,6}[ \t]+(.+)$", re.MULTILINE)
+READ_BUFFER_SIZE = 1 << 16
+
+
+def read_note_text(path: Path) -> Optional[str]:
+    try:
+        with open(path, "rb", buffering=READ_BUFFER_SIZE) as f:
+            text = f.read().decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    # Match the newline handling of text-mode reads in projects_manager
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def chunk_note(text: str) -> List[List[Any]]:
+    # Sections as [start, end, heading]; text before the first heading gets ""
+    boundaries = [
+        (match.start(), match.group(1).strip())
+        for match in HEADING_PATTERN.finditer(text)
+    ]
+    if not boundaries or boundaries[0][0] != 0:
+        boundaries.insert(0, (0, ""))
+
+    chunks = []
+    for index, (start, heading) in enumerate(boundaries):
+        end = boundaries[index + 1][0] if index + 1 < len(boundaries) else len(text)
+        if end > start:
+            chunks.append([start, end, heading])
+    return chunks
+
+
+def index_note_file(path: str) -> Optional[Dict[str, Any]]:
+    text = read_note_text(Path(path))
+    if text is None:
+        return None
+
+    stat = os.stat(path)
+    return {
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "tokens": dict(Counter(tokenize(text))),
+        "chunks": chunk_note(text),
+    }
@@ -0,0 +1,502 @@
+import bisect
+import heapq
+import math
+import threading
+import traceback
+from array import array
+from collections import Counter
+from itertools import compress
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.logic import events
+from src.logic.projects_manager import iter_project_file_names
+from src.logic.search.scanner import list_note_paths, map_scan_tasks
+from src.logic.search.tokenizer import read_note_text
+from src.models import ChangeEvent, TypeaheadHit
+from src.settings import settings
+
+NAME_PREFIX_SCORE = 1.0
+NAME_SUBSTRING_SCORE = 0.9
+NAME_FUZZY_WEIGHT = 0.8
+CONTENT_SUBSTRING_SCORE = 0.7
+CONTENT_FUZZY_WEIGHT = 0.6
+# Share of the query's trigrams a note needs for a fuzzy (typo) match
+FUZZY_MIN_OVERLAP = 0.6
+# Trigrams in more than this share of notes barely narrow a fuzzy match down
+FUZZY_MAX_TRIGRAM_SHARE = 0.25
+SNIPPET_RADIUS = 60
+EMPTY_POSTING = array("I")
+
+
+def get_trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def has_posting(posting: array, doc_id: int) -> bool:
+    # Postings are appended in doc id order, so they stay sorted
+    index = bisect.bisect_left(posting, doc_id)
+    return index < len(posting) and posting[index] == doc_id
+
+
+def get_best_counts(
+    counts: Counter, min_count: int, limit: int
+) -> List[Tuple[int, int]]:
+    # Highest counts first, newest doc first among equals. Candidates are
+    # filtered with compress so the pass over all of them stays in C.
+    doc_ids = list(compress(counts.keys(), map(min_count.__le__, counts.values())))
+    return heapq.nlargest(
+        limit, zip(doc_ids, map(counts.__getitem__, doc_ids)), key=itemgetter(1, 0)
+    )
+
+
+def get_highlight_ranges(text_lower: str, query_trigrams: Set[str]) -> List[List[int]]:
+    # Every occurrence of a query trigram, merged into runs; an exact match
+    # becomes one run and a near miss a few shorter ones
+    starts = []
+    for trigram in query_trigrams:
+        start = text_lower.find(trigram)
+        while start >= 0:
+            starts.append(start)
+            start = text_lower.find(trigram, start + 1)
+    starts.sort()
+
+    ranges: List[List[int]] = []
+    for start in starts:
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], start + 3)
+        else:
+            ranges.append([start, start + 3])
+    return ranges
+
+
+def build_snippet(
+    content: str, query: str, query_trigrams: Set[str], search_body: bool = True
+) -> Tuple[str, List[List[int]]]:
+    content_lower = content.lower()
+    position = content_lower.find(query)
+    if position >= 0:
+        start, end = get_snippet_window(content, position + len(query) // 2)
+        # The exact match is what the user typed, so only it is highlighted
+        return content[start:end], [[position - start, position - start + len(query)]]
+
+    if search_body:
+        ranges = get_highlight_ranges(content_lower, query_trigrams)
+        if not ranges:
+            return content[: SNIPPET_RADIUS * 2].strip(), []
+        longest = max(ranges, key=lambda r: r[1] - r[0])
+        center = (longest[0] + longest[1]) // 2
+    else:
+        # The name matched, so the note's opening is shown
+        center = SNIPPET_RADIUS
+
+    start, end = get_snippet_window(content, center)
+    return content[start:end], get_highlight_ranges(
+        content_lower[start:end], query_trigrams
+    )
+
+
+def get_snippet_window(content: str, center: int) -> Tuple[int, int]:
+    return max(0, center - SNIPPET_RADIUS), min(len(content), center + SNIPPET_RADIUS)
+
+
+class TrigramIndex:
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        # Doc ids only ever grow; updates retire the old id and postings are
+        # compacted once retired ids outnumber live ones
+        self._doc_names: List[Optional[str]] = []
+        self._doc_ids: Dict[str, int] = {}
+        self._name_keys: Dict[int, str] = {}
+        self._name_postings: Dict[str, Set[int]] = {}
+        self._postings: Dict[str, array] = {}
+        self._retired = 0
+        # Guards the in-memory structures; searches hold it only while picking
+        # candidates, not while reading notes for snippets
+        self._lock = threading.Lock()
+        # Sorted names, also joined into one string for substring scans;
+        # rebuilt on the next search after any name changes
+        self._sorted_names: List[str] = []
+        self._sorted_name_ids: List[int] = []
+        self._name_offsets: List[int] = []
+        self._name_blob: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def set_note(self, file_name: str, content: str) -> None:
+        with self._lock:
+            self._retire(file_name)
+            doc_id = len(self._doc_names)
+            self._doc_names.append(file_name)
+            self._doc_ids[file_name] = doc_id
+            self._set_name_key(doc_id, file_name)
+            for trigram in get_trigrams(content.lower()):
+                postings = self._postings.get(trigram)
+                if postings is None:
+                    postings = self._postings[trigram] = array("I")
+                postings.append(doc_id)
+
+    def remove_note(self, file_name: str) -> None:
+        with self._lock:
+            self._retire(file_name)
+
+    def rename_note(self, old_file_name: str, new_file_name: str) -> None:
+        with self._lock:
+            doc_id = self._doc_ids.pop(old_file_name, None)
+            if doc_id is None:
+                return
+            self._retire(new_file_name)
+            self._drop_name_key(doc_id)
+            self._doc_names[doc_id] = new_file_name
+            self._doc_ids[new_file_name] = doc_id
+            self._set_name_key(doc_id, new_file_name)
+
+    def search(self, query: str, limit: int) -> List[TypeaheadHit]:
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        query_trigrams = get_trigrams(query)
+        with self._lock:
+            best = self._find_matches(query, query_trigrams, limit)
+
+        project_path = settings.data_path / self.project_id
+        hits = []
+        for file_name, score, match in best:
+            snippet, highlights = "", []
+            content = read_note_text(project_path / f"{file_name}.md")
+            if content is not None:
+                if match == "content" and query not in content.lower():
+                    # Holding every trigram doesn't guarantee the exact text
+                    score = CONTENT_FUZZY_WEIGHT
+                snippet, highlights = build_snippet(
+                    content, query, query_trigrams, search_body=match == "content"
+                )
+            hits.append(
+                TypeaheadHit(
+                    file=file_name,
+                    match=match,
+                    score=round(score, 4),
+                    snippet=snippet,
+                    highlights=highlights,
+                )
+            )
+        hits.sort(key=lambda hit: -hit.score)
+        return hits
+
+    def _find_matches(
+        self, query: str, query_trigrams: Set[str], limit: int
+    ) -> List[Tuple[str, float, str]]:
+        # Candidates are collected tier by tier (name prefix, name substring,
+        # content substring, fuzzy) and each tier stops once the page is full
+        matches: Dict[int, Tuple[float, str]] = {}
+        for doc_id in self._match_names(query, limit):
+            name_key = self._name_keys[doc_id]
+            score = (
+                NAME_PREFIX_SCORE
+                if name_key.startswith(query)
+                else NAME_SUBSTRING_SCORE
+            )
+            matches[doc_id] = (score, "name")
+
+        if query_trigrams and len(matches) < limit:
+            for doc_id in self._match_content(query_trigrams, limit, matches):
+                matches[doc_id] = (CONTENT_SUBSTRING_SCORE, "content")
+
+        if query_trigrams and len(matches) < limit:
+            fuzzy = self._match_fuzzy(query_trigrams, limit, matches)
+            for doc_id, match in fuzzy.items():
+                matches[doc_id] = match
+
+        best = heapq.nsmallest(
+            limit, matches.items(), key=lambda item: (-item[1][0], -item[0])
+        )
+        return [
+            (self._doc_names[doc_id], score, match) for doc_id, (score, match) in best
+        ]
+
+    def _match_names(self, query: str, limit: int) -> List[int]:
+        self._ensure_name_blob()
+
+        # Prefix matches straight from the sorted names
+        doc_ids: List[int] = []
+        position = bisect.bisect_left(self._sorted_names, query)
+        while len(doc_ids) < limit and position < len(self._sorted_names):
+            if not self._sorted_names[position].startswith(query):
+                break
+            doc_ids.append(self._sorted_name_ids[position])
+            position += 1
+
+        # Then substrings, found by C-level scans over all names joined up
+        seen = set(doc_ids)
+        offset = self._name_blob.find(query)
+        while len(doc_ids) < limit and offset >= 0:
+            index = bisect.bisect_right(self._name_offsets, offset) - 1
+            doc_id = self._sorted_name_ids[index]
+            if doc_id not in seen:
+                seen.add(doc_id)
+                doc_ids.append(doc_id)
+            # Skip to the next name; one match per name is enough
+            offset = self._name_blob.find(
+                query, self._name_offsets[index] + len(self._sorted_names[index]) + 1
+            )
+        return doc_ids
+
+    def _match_content(
+        self, query_trigrams: Set[str], limit: int, matches: Dict[int, Any]
+    ) -> List[int]:
+        postings = sorted(
+            (self._postings.get(trigram, EMPTY_POSTING) for trigram in query_trigrams),
+            key=len,
+        )
+
+        # Notes holding every trigram almost always contain the query itself.
+        # The rarest posting is walked newest first (recent edits win ties),
+        # checking the others by binary search, until the page is full.
+        doc_ids: List[int] = []
+        rarest, others = postings[0], postings[1:]
+        for doc_id in reversed(rarest):
+            if len(matches) + len(doc_ids) >= limit:
+                break
+            if doc_id in matches or self._doc_names[doc_id] is None:
+                continue
+            if all(has_posting(posting, doc_id) for posting in others):
+                doc_ids.append(doc_id)
+        return doc_ids
+
+    def _match_fuzzy(
+        self, query_trigrams: Set[str], limit: int, matches: Dict[int, Any]
+    ) -> Dict[int, Tuple[float, str]]:
+        # Typos: names and notes sharing most of the query's trigrams. Only the
+        # best candidates of each kind are scored, since just the rest of the
+        # page can be shown.
+        min_count = math.ceil(FUZZY_MIN_OVERLAP * len(query_trigrams))
+        wanted = limit - len(matches)
+        fuzzy: Dict[int, Tuple[float, str]] = {}
+
+        name_counts: Counter = Counter()
+        for trigram in query_trigrams:
+            name_counts.update(self._name_postings.get(trigram, ()))
+        for doc_id, count in get_best_counts(name_counts, min_count, limit):
+            if len(fuzzy) >= wanted:
+                break
+            if doc_id not in matches:
+                score = NAME_FUZZY_WEIGHT * count / len(query_trigrams)
+                fuzzy[doc_id] = (score, "name")
+
+        # Content matches can't outscore a page of strong name matches
+        strong = sum(1 for score, _ in fuzzy.values() if score >= CONTENT_FUZZY_WEIGHT)
+        if strong >= wanted:
+            return fuzzy
+
+        # Very common trigrams are left out; they would touch most notes for
+        # little
+        max_posting_length = max(1, int(FUZZY_MAX_TRIGRAM_SHARE * len(self._doc_ids)))
+        content_counts: Counter = Counter()
+        for trigram in query_trigrams:
+            posting = self._postings.get(trigram, EMPTY_POSTING)
+            if len(posting) <= max_posting_length:
+                content_counts.update(posting)
+        # Retired notes and name matches get skipped, so room is left for them
+        candidate_limit = limit + len(fuzzy) + self._retired
+        found = 0
+        for doc_id, count in get_best_counts(
+            content_counts, min_count, candidate_limit
+        ):
+            if found >= wanted:
+                break
+            if doc_id in matches or self._doc_names[doc_id] is None:
+                continue
+            score = CONTENT_FUZZY_WEIGHT * count / len(query_trigrams)
+            if score > fuzzy.get(doc_id, (0.0, ""))[0]:
+                fuzzy[doc_id] = (score, "content")
+                found += 1
+        return fuzzy
+
+    def _ensure_name_blob(self) -> None:
+        if self._name_blob is not None:
+            return
+
+        ordered = sorted((key, doc_id) for doc_id, key in self._name_keys.items())
+        self._sorted_names = [key for key, _ in ordered]
+        self._sorted_name_ids = [doc_id for _, doc_id in ordered]
+        self._name_offsets = []
+        offset = 0
+        for key in self._sorted_names:
+            self._name_offsets.append(offset)
+            offset += len(key) + 1
+        self._name_blob = "\n".join(self._sorted_names)
+
+    def _retire(self, file_name: str) -> None:
+        doc_id = self._doc_ids.pop(file_name, None)
+        if doc_id is None:
+            return
+        self._doc_names[doc_id] = None
+        self._drop_name_key(doc_id)
+        self._retired += 1
+        if self._retired > len(self._doc_ids) and self._retired > 1024:
+            self._compact()
+
+    def _compact(self) -> None:
+        new_ids: Dict[int, int] = {}
+        doc_names: List[Optional[str]] = []
+        for doc_id, file_name in enumerate(self._doc_names):
+            if file_name is not None:
+                new_ids[doc_id] = len(doc_names)
+                doc_names.append(file_name)
+
+        postings: Dict[str, array] = {}
+        for trigram, posting in self._postings.items():
+            remapped = array("I", (new_ids[i] for i in posting if i in new_ids))
+            if remapped:
+                postings[trigram] = remapped
+
+        self._doc_names = doc_names
+        self._doc_ids = {name: doc_id for doc_id, name in enumerate(doc_names)}
+        self._name_keys = {}
+        self._name_postings = {}
+        for doc_id, name in enumerate(doc_names):
+            self._set_name_key(doc_id, name)
+        self._postings = postings
+        self._retired = 0
+
+    def _set_name_key(self, doc_id: int, file_name: str) -> None:
+        name_key = file_name.lower()
+        self._name_keys[doc_id] = name_key
+        self._name_blob = None
+        for trigram in get_trigrams(name_key):
+            self._name_postings.setdefault(trigram, set()).add(doc_id)
+
+    def _drop_name_key(self, doc_id: int) -> None:
+        name_key = self._name_keys.pop(doc_id, None)
+        if name_key is None:
+            return
+        self._name_blob = None
+        for trigram in get_trigrams(name_key):
+            doc_ids = self._name_postings.get(trigram)
+            if doc_ids is not None:
+                doc_ids.discard(doc_id)
+                if not doc_ids:
+                    del self._name_postings[trigram]
+
+
+class TypeaheadService:
+    def __init__(self):
+        self._indexes: Dict[str, TrigramIndex] = {}
+        self._building: Dict[str, List[ChangeEvent]] = {}
+        # Builds overtaken by a project-wide change (an import, say) that their
+        # scan may have missed; they are thrown away and started over
+        self._stale: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def search(self, project_id: str, query: str, limit: int) -> List[TypeaheadHit]:
+        project_path = settings.data_path / project_id
+        if not project_path.is_dir():
+            raise ValueError(f"Project not found: {project_id}")
+
+        with self._lock:
+            index = self._indexes.get(project_id)
+            if index is None and project_id not in self._building:
+                self._start_build(project_id)
+
+        if index is not None:
+            return index.search(query, limit)
+        # Names only until the first build is done
+        return search_note_names(project_path, query, limit)
+
+    def _start_build(self, project_id: str) -> None:
+        # Changes during the scan are replayed once it finishes
+        self._building[project_id] = []
+        threading.Thread(target=self._build, args=(project_id,), daemon=True).start()
+
+    def _build(self, project_id: str) -> None:
+        project_path = settings.data_path / project_id
+
+        def read_note(path: Path) -> Tuple[str, Optional[str]]:
+            return path.stem, read_note_text(path)
+
+        index = TrigramIndex(project_id)
+        try:
+            for file_name, content in map_scan_tasks(
+                read_note, list_note_paths(project_path)
+            ):
+                if content is not None:
+                    index.set_note(file_name, content)
+        except Exception:
+            print(traceback.format_exc())
+            with self._lock:
+                # The next search starts over
+                self._building.pop(project_id, None)
+                self._stale.discard(project_id)
+            return
+
+        with self._lock:
+            replay = self._building.pop(project_id, [])
+            if not project_path.is_dir():
+                self._stale.discard(project_id)
+                return
+            if project_id in self._stale:
+                self._stale.discard(project_id)
+                self._start_build(project_id)
+                return
+            for event in replay:
+                self._apply(index, event)
+            self._indexes[project_id] = index
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        if event.type.startswith("project_"):
+            with self._lock:
+                for path in (event.path, event.old_path):
+                    if path:
+                        self._indexes.pop(path, None)
+                        if path in self._building:
+                            self._stale.add(path)
+            return
+
+        with self._lock:
+            if event.project_id in self._building:
+                self._building[event.project_id].append(event)
+                return
+            index = self._indexes.get(event.project_id)
+            if index is not None:
+                self._apply(index, event)
+
+    def _apply(self, index: TrigramIndex, event: ChangeEvent) -> None:
+        if not event.path or not event.path.endswith(".md"):
+            return
+
+        path = Path(event.path)
+        if event.type == "file_deleted":
+            index.remove_note(path.stem)
+        elif event.type == "file_renamed" and event.old_path:
+            index.rename_note(Path(event.old_path).stem, path.stem)
+        else:
+            content = read_note_text(settings.data_path / path)
+            if content is None:
+                index.remove_note(path.stem)
+            else:
+                index.set_note(path.stem, content)
+
+
+def search_note_names(project_path: Path, query: str, limit: int) -> List[TypeaheadHit]:
+    query = query.strip().lower()
+    if not query:
+        return []
+
+    hits = []
+    for file_name in iter_project_file_names(project_path):
+        name_key = file_name.lower()
+        if name_key.startswith(query):
+            score = NAME_PREFIX_SCORE
+        elif query in name_key:
+            score = NAME_SUBSTRING_SCORE
+        else:
+            continue
+        hits.append(TypeaheadHit(file=file_name, match="name", score=score, snippet=""))
+    return heapq.nsmallest(limit, hits, key=lambda hit: (-hit.score, hit.file))
+
+
+typeahead_service = TypeaheadService()
+events.subscribe(typeahead_service._on_change)
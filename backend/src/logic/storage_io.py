@@ -0,0 +1,19 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from src.settings import settings
+
+T = TypeVar("T")
+
+_storage_pool = ThreadPoolExecutor(
+    max_workers=settings.storage_workers, thread_name_prefix="storage-io"
+)
+
+
+async def run_storage_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    # Blocking file system calls run off the event loop; the pool size also
+    # caps how many requests touch the disk at once, the rest wait their turn
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_storage_pool, partial(func, *args, **kwargs))
@@ -0,0 +1,223 @@
+import os
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.logic import events
+from src.models import ChangeEvent
+from src.settings import settings
+
+try:
+    import watchfiles
+except ImportError:  # Optional, falls back to polling
+    watchfiles = None
+
+ProjectSnapshot = Dict[str, Tuple[int, int]]
+
+
+def snapshot_project(project_id: str) -> Optional[ProjectSnapshot]:
+    snapshot = {}
+    try:
+        with os.scandir(settings.data_path / project_id) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.name.endswith(".md"):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except PermissionError:
+        pass
+    return snapshot
+
+
+def list_project_dirs() -> Set[str]:
+    try:
+        with os.scandir(settings.data_path) as entries:
+            return {
+                entry.name
+                for entry in entries
+                if not entry.name.startswith(".") and entry.is_dir()
+            }
+    except FileNotFoundError:
+        return set()
+
+
+def diff_project(
+    project_id: str, before: Optional[ProjectSnapshot], after: Optional[ProjectSnapshot]
+) -> List[ChangeEvent]:
+    if before is None and after is None:
+        return []
+    if before is None:
+        return [
+            ChangeEvent(
+                type="project_created",
+                project_id=project_id,
+                path=project_id,
+                source="watcher",
+            )
+        ]
+    if after is None:
+        return [
+            ChangeEvent(
+                type="project_deleted",
+                project_id=project_id,
+                path=project_id,
+                source="watcher",
+            )
+        ]
+
+    changes = []
+    for file_name in sorted(before.keys() | after.keys()):
+        if file_name not in before:
+            change_type = "file_created"
+        elif file_name not in after:
+            change_type = "file_deleted"
+        elif before[file_name] != after[file_name]:
+            change_type = "file_saved"
+        else:
+            continue
+        changes.append(
+            ChangeEvent(
+                type=change_type,
+                project_id=project_id,
+                path=f"{project_id}/{file_name}",
+                source="watcher",
+            )
+        )
+    return changes
+
+
+class FileWatcher:
+    def __init__(self):
+        self._snapshots: Dict[str, ProjectSnapshot] = {}
+        self._recent_app_paths: Dict[str, float] = {}
+        self._importing_projects: Set[str] = set()
+        self._recent_imports: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if watchfiles is not None else "polling"
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._snapshots = {
+            project_id: snapshot_project(project_id) or {}
+            for project_id in list_project_dirs()
+        }
+        events.subscribe(self._remember_app_change)
+
+        target = self._watch if watchfiles is not None else self._poll
+        self._thread = threading.Thread(target=target, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        events.unsubscribe(self._remember_app_change)
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _remember_app_change(self, event: ChangeEvent) -> None:
+        # The app already announced its own writes; the watcher only reports
+        # what happened behind its back.
+        if event.source == "watcher":
+            return
+        now = time.monotonic()
+        with self._lock:
+            for path in (event.path, event.old_path):
+                if path:
+                    self._recent_app_paths[path] = now
+            # Bulk imports announce the project once, not each file they write
+            if event.type == "project_import_started":
+                self._importing_projects.add(event.project_id)
+            elif event.type == "project_imported":
+                self._importing_projects.discard(event.project_id)
+                self._recent_imports[event.project_id] = now
+
+    def _is_recent_app_change(self, event: ChangeEvent) -> bool:
+        window = settings.watch_debounce + settings.watch_poll_interval
+        now = time.monotonic()
+        with self._lock:
+            self._recent_app_paths = {
+                path: seen
+                for path, seen in self._recent_app_paths.items()
+                if now - seen <= window
+            }
+            self._recent_imports = {
+                project_id: seen
+                for project_id, seen in self._recent_imports.items()
+                if now - seen <= window
+            }
+            if event.type.startswith("file_") and (
+                event.project_id in self._importing_projects
+                or event.project_id in self._recent_imports
+            ):
+                return True
+            return event.path in self._recent_app_paths
+
+    def _rescan(self, project_ids: Set[str]) -> None:
+        for project_id in sorted(project_ids):
+            before = self._snapshots.get(project_id)
+            after = snapshot_project(project_id)
+            if after is None:
+                self._snapshots.pop(project_id, None)
+            else:
+                self._snapshots[project_id] = after
+
+            for event in diff_project(project_id, before, after):
+                if not self._is_recent_app_change(event):
+                    events.publish(event)
+
+    def _poll(self) -> None:
+        while not self._stop.wait(settings.watch_poll_interval):
+            try:
+                self._rescan(set(self._snapshots) | list_project_dirs())
+            except Exception:
+                print(traceback.format_exc())
+
+    def _watch(self) -> None:
+        data_path = settings.data_path.resolve()
+        for changes in watchfiles.watch(
+            data_path,
+            debounce=int(settings.watch_debounce * 1000),
+            stop_event=self._stop,
+            recursive=True,
+        ):
+            # watchfiles already debounces and batches; the snapshot diff
+            # coalesces each batch into one event per file.
+            project_ids = set()
+            for _, changed_path in changes:
+                try:
+                    relative_parts = os.path.relpath(changed_path, data_path).split(
+                        os.sep
+                    )
+                except ValueError:
+                    continue
+                if relative_parts[0].startswith(".") or relative_parts[0] == "..":
+                    continue
+                if len(relative_parts) == 1 and not os.path.isdir(changed_path):
+                    if relative_parts[0] not in self._snapshots:
+                        continue  # Loose file in the data folder, e.g. the state db
+                project_ids.add(relative_parts[0])
+            try:
+                self._rescan(project_ids)
+            except Exception:
+                print(traceback.format_exc())
+
+
+file_watcher = FileWatcher()
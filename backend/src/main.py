@@ -4,21 +4,54 @@ from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
+from src.compression import CompressionMiddleware
+from src.logic.ai_tutor.note_summaries import prune_summaries, summary_service
+from src.logic.blob_store import prune_blobs
 from src.logic.config_manager import initialize_config_file
+from src.logic.search.indexer import indexing_service
+from src.logic.watcher import file_watcher
+from src.settings import settings
 from src.v1 import routes as v1
+from src.v1.responses import FastJSONResponse
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     # Startup
     initialize_config_file()
+    prune_blobs(settings.blob_retention_days)
+    prune_summaries(settings.blob_retention_days)
+    if settings.file_watcher_enabled:
+        file_watcher.start()
+        print(f"Watching {settings.data_path} ({file_watcher.backend})")
+    if settings.background_indexing_enabled:
+        indexing_service.start()
+    if settings.background_summaries_enabled:
+        summary_service.start()
     print("Application started")
     yield
     # Shutdown
     print("Application shutting down")
+    summary_service.stop()
+    indexing_service.stop()
+    file_watcher.stop()
 
 
-app = FastAPI(title="Learn with GenAI API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(
+    title="Learn with GenAI API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        offload_size=settings.compression_offload_size,
+        gzip_level=settings.gzip_level,
+        brotli_quality=settings.brotli_quality,
+    )
 
 origins = ["http://localhost:3000"]
 app.add_middleware(
@@ -27,6 +60,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
 api_router = APIRouter(prefix="/api")
@@ -9,6 +9,7 @@ class Project(BaseModel):
     name: str
     path: str
     file_names: List[str]
+    file_count: int = 0
     created: datetime
     modified: datetime
 
@@ -32,3 +33,59 @@ class FileContent(BaseModel):
 class AITutorResponse(BaseModel):
     response: str
     success: bool
+
+
+class ChangeEvent(BaseModel):
+    type: (
+        str  # "file_saved", "file_created", "file_deleted", "file_renamed", "project_*"
+    )
+    project_id: str
+    path: Optional[str] = None
+    old_path: Optional[str] = None
+    source: str = "app"  # "app", "watcher"
+
+
+class ImportResult(BaseModel):
+    project_id: str
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: List[str] = Field(default_factory=list)
+
+
+class ShardHit(BaseModel):
+    project: str
+    file: str
+    path: str
+    content: str
+    matched_terms: List[str]
+
+
+class ShardResult(BaseModel):
+    project_id: str
+    document_count: int
+    document_frequencies: Dict[str, int]
+    hits: List[ShardHit]
+
+
+class IndexStatus(BaseModel):
+    project_id: str
+    state: str  # "pending", "indexing", "ready", "stale", "error"
+    indexed_files: int = 0
+    total_files: int = 0
+    updated: Optional[datetime] = None
+
+
+class TypeaheadHit(BaseModel):
+    file: str
+    match: str  # "name", "content"
+    score: float
+    snippet: str
+    highlights: List[List[int]] = Field(default_factory=list)  # [start, end] in snippet
+
+
+class NoteEditResult(BaseModel):
+    path: str
+    offset: int
+    length: int
+    hash: str
@@ -26,6 +26,182 @@ class Settings(BaseSettings):
         default="gpt-4o-mini", description="OpenAI lite model"
     )
 
+    anthropic_base_url: str = Field(
+        default="", description="Override Anthropic API URL (e.g. local stand-in)"
+    )
+    openai_base_url: str = Field(
+        default="", description="Override OpenAI API URL (e.g. local stand-in)"
+    )
+
+    llm_provider_mode: str = Field(
+        default="single", description="LLM provider mode: 'single' or 'hedged'"
+    )
+    llm_primary_provider: str = Field(
+        default="anthropic", description="Preferred provider: 'anthropic' or 'openai'"
+    )
+    hedge_percentile: float = Field(
+        default=0.95,
+        description="Percentile of primary first-token latency used as hedge deadline",
+    )
+    hedge_initial_delay: float = Field(
+        default=3.0,
+        description="Hedge deadline in seconds until enough latency samples exist",
+    )
+    hedge_min_delay: float = Field(
+        default=0.25, description="Lower bound in seconds for the hedge deadline"
+    )
+    hedge_min_samples: int = Field(
+        default=10, description="Latency samples needed before using the percentile"
+    )
+    hedge_latency_window: int = Field(
+        default=200, description="Number of first-token latencies kept per provider"
+    )
+    circuit_breaker_window: int = Field(
+        default=20, description="Number of recent outcomes tracked per provider"
+    )
+    circuit_breaker_min_requests: int = Field(
+        default=5, description="Outcomes needed before the breaker can open"
+    )
+    circuit_breaker_error_rate: float = Field(
+        default=0.5, description="Error rate at which a provider's breaker opens"
+    )
+    circuit_breaker_cooldown: float = Field(
+        default=30.0, description="Seconds an open breaker waits before a trial call"
+    )
+
+    answer_cache_enabled: bool = Field(
+        default=False, description="Reuse final responses for repeated questions"
+    )
+    answer_cache_max_entries: int = Field(
+        default=256, description="Maximum number of cached final responses"
+    )
+
+    merged_general_answer_enabled: bool = Field(
+        default=False,
+        description=(
+            "Route and answer GENERAL queries in a single main-model call; "
+            "those answers skip the lite-model cascade"
+        ),
+    )
+
+    tutor_request_deadline: float = Field(
+        default=60.0,
+        description="Seconds a tutor request may take before steps are skipped (0 = off)",
+    )
+    tutor_answer_reserve: float = Field(
+        default=20.0, description="Seconds of the deadline kept for the final answer"
+    )
+    tutor_analysis_budget: float = Field(
+        default=10.0, description="Most seconds spent classifying a question"
+    )
+    tutor_retrieval_budget: float = Field(
+        default=5.0, description="Seconds needed before notes are searched at all"
+    )
+
+    cascade_enabled: bool = Field(
+        default=False,
+        description="Answer with the lite model first and escalate doubtful answers",
+    )
+    cascade_min_answer_chars: int = Field(
+        default=120, description="Lite answers shorter than this are escalated"
+    )
+    cascade_min_context_overlap: float = Field(
+        default=0.2,
+        description="Share of an answer's content words that must come from the notes",
+    )
+
+    blob_retention_days: float = Field(
+        default=30.0, description="Days an unused note snapshot is kept for the tutor"
+    )
+
+    background_summaries_enabled: bool = Field(
+        default=False,
+        description="Summarize changed notes in the background for cheaper context",
+    )
+    summary_rate_per_minute: float = Field(
+        default=6.0, description="Most lite-model summary calls made per minute"
+    )
+    summary_quiet_period: float = Field(
+        default=30.0, description="Seconds a note must go unchanged before summarizing"
+    )
+    summary_min_chars: int = Field(
+        default=2000, description="Shortest note in characters worth summarizing"
+    )
+    full_text_context_files: int = Field(
+        default=3,
+        description="Top-ranked hits sent in full; the rest use summaries if ready",
+    )
+
+    search_shard_workers: int = Field(
+        default=8, description="Worker threads for querying projects in parallel"
+    )
+
+    scan_workers: int = Field(
+        default=8, description="Worker threads for reading notes during scans"
+    )
+
+    background_indexing_enabled: bool = Field(
+        default=True, description="Build search indexes in the background on startup"
+    )
+    index_workers: int = Field(
+        default=2, description="Worker processes for tokenizing and chunking notes"
+    )
+
+    storage_workers: int = Field(
+        default=4, description="Worker threads serving file operations for API routes"
+    )
+
+    import_workers: int = Field(
+        default=8, description="Note writer threads shared by all bulk imports"
+    )
+    import_max_file_size: int = Field(
+        default=10 * 1024 * 1024,
+        description="Largest note in bytes a bulk import accepts",
+    )
+
+    file_watcher_enabled: bool = Field(
+        default=True, description="Watch the data folder for external edits"
+    )
+    watch_debounce: float = Field(
+        default=0.5, description="Seconds of quiet before watcher changes are emitted"
+    )
+    watch_poll_interval: float = Field(
+        default=2.0, description="Polling interval in seconds when inotify is missing"
+    )
+
+    thread_state_cache_max_entries: int = Field(
+        default=128, description="Recently active threads kept in memory for resumes"
+    )
+    thread_state_cache_ttl: float = Field(
+        default=900.0, description="Seconds a thread's latest state stays cached"
+    )
+
+    single_flight_replay_window: float = Field(
+        default=10.0,
+        description="Seconds a finished tutor run can still be replayed to duplicates",
+    )
+
+    json_backend: str = Field(
+        default="auto",
+        description="JSON library: 'auto', 'orjson', 'msgspec' or 'json' (stdlib)",
+    )
+
+    compression_enabled: bool = Field(
+        default=True, description="Compress JSON responses and event streams"
+    )
+    compression_min_size: int = Field(
+        default=1024, description="Smallest response body in bytes worth compressing"
+    )
+    compression_offload_size: int = Field(
+        default=64 * 1024,
+        description="Bodies from this many bytes are compressed off the event loop",
+    )
+    gzip_level: int = Field(default=6, description="gzip compression level (1-9)")
+    brotli_quality: int = Field(
+        default=4,
+        description="brotli quality (0-11) when the brotli package is installed",
+    )
+
     @property
     def data_path(self) -> Path:
         if Path(self.data_folder).is_absolute():
@@ -0,0 +1,17 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from src.logic.json_codec import dumps
+
+SSE_KEEP_ALIVE_FRAME = b": keep-alive\n\n"
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def encode_sse_frame(payload: Any) -> bytes:
+    # Frames are encoded once as bytes, so replays and fan-out reuse them as is
+    return b"data: " + dumps(payload) + b"\n\n"
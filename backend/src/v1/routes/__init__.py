@@ -1,9 +1,12 @@
 from fastapi import APIRouter
 
-from . import ai_tutor, config, projects
+from . import ai_tutor, config, events, indexing, metrics, projects
 
 router = APIRouter(prefix="/v1")
 
 router.include_router(projects.router)
 router.include_router(config.router)
 router.include_router(ai_tutor.router)
+router.include_router(metrics.router)
+router.include_router(indexing.router)
+router.include_router(events.router)
@@ -1,46 +1,91 @@
+import asyncio
+import threading
 import traceback
 import uuid
 from typing import Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 
 from src.logic.ai_tutor.graphs.main import stream_ai_tutor_workflow
+from src.logic.ai_tutor.single_flight import RunSubscription, stream_single_flight
 from src.logic.config_manager import get_active_file_name
-from src.logic.projects_manager import open_file_by_id
+from src.logic.projects_manager import get_content_hash, open_file_by_id
+from src.logic.storage_io import run_storage_io
+from src.v1.responses import encode_sse_frame
 from src.v1.schema import AITutorChatRequest, AITutorStreamMessage
 
 router = APIRouter(prefix="/ai-tutor", tags=["ai-tutor"])
 
 
 @router.post("/chat")
-async def chat(request: AITutorChatRequest):
+async def chat(request: AITutorChatRequest, http_request: Request):
     active_file_content: Optional[str] = None
-    active_file_name = get_active_file_name()
+    active_file_path = ""
+    active_file_name = await run_storage_io(get_active_file_name)
     if active_file_name:
         try:
-            file_content = open_file_by_id(request.project_id, active_file_name)
+            file_content = await run_storage_io(
+                open_file_by_id, request.project_id, active_file_name
+            )
             active_file_content = file_content.content
+            active_file_path = file_content.path
         except Exception:
             active_file_content = None
 
     thread_id = request.thread_id or str(uuid.uuid4())
 
+    def run_workflow(cancelled: threading.Event):
+        for result in stream_ai_tutor_workflow(
+            user_message=request.message,
+            project_id=request.project_id,
+            thread_id=thread_id,
+            conversation_history=request.conversation_history,
+            highlighted_text=request.highlighted_text,
+            active_file_content=active_file_content,
+            active_file_path=active_file_path,
+            hitl_input=request.hitl_input,
+            search_scope=request.search_scope,
+            search_project_ids=request.search_project_ids,
+            cancelled=cancelled,
+        ):
+            # Encoded once here; duplicates attached to this run replay the
+            # same frames, thread_id included
+            yield encode_sse_frame(
+                AITutorStreamMessage(
+                    type=result["type"],
+                    content=result["content"],
+                    thread_id=thread_id,
+                )
+            )
+
+    # Identical requests (double-clicks, retries, reconnects) share one run.
+    # Only a client-sent thread id can coalesce: a freshly minted one never
+    # matches, so two clients asking the same first question stay apart. The
+    # active note is read here rather than sent, so its hash goes in too.
+    run_key = get_content_hash(
+        "\n".join(
+            [
+                thread_id,
+                request.model_dump_json(),
+                get_content_hash(active_file_path + "\n" + (active_file_content or "")),
+            ]
+        )
+    )
+
+    async def close_on_disconnect(subscription: RunSubscription):
+        while (await http_request.receive())["type"] != "http.disconnect":
+            pass
+        subscription.close()
+
     async def generate_stream():
+        subscription = stream_single_flight(run_key, run_workflow)
+        # Once the client is gone its subscription is dropped, and the run is
+        # cancelled (LLM calls included) when no duplicate is still listening
+        disconnect_watcher = asyncio.create_task(close_on_disconnect(subscription))
         try:
-            for result in stream_ai_tutor_workflow(
-                user_message=request.message,
-                project_id=request.project_id,
-                thread_id=thread_id,
-                conversation_history=request.conversation_history,
-                highlighted_text=request.highlighted_text,
-                active_file_content=active_file_content,
-                hitl_input=request.hitl_input,
-            ):
-                stream_msg = AITutorStreamMessage(
-                    type=result["type"], content=result["content"], thread_id=thread_id
-                )
-                yield f"data: {stream_msg.model_dump_json()}\n\n"
+            async for frame in subscription:
+                yield frame
         except Exception:
             error_msg = AITutorStreamMessage(
                 type="final",
@@ -48,7 +93,10 @@ async def chat(request: AITutorChatRequest):
                 thread_id=thread_id,
             )
             print(traceback.format_exc())
-            yield f"data: {error_msg.model_dump_json()}\n\n"
+            yield encode_sse_frame(error_msg)
+        finally:
+            disconnect_watcher.cancel()
+            subscription.close()
 
     return StreamingResponse(
         generate_stream(),
@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from src.logic import events
+from src.models import ChangeEvent
+from src.v1.responses import SSE_KEEP_ALIVE_FRAME, encode_sse_frame
+from src.v1.schema import change_event_to_response
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+KEEP_ALIVE_SECONDS = 15
+
+
+@router.get("")
+async def stream_change_events(request: Request):
+    loop = asyncio.get_running_loop()
+    changes: asyncio.Queue = asyncio.Queue()
+
+    def forward(event: ChangeEvent) -> None:
+        # Published from worker threads, so hop onto the request's loop
+        loop.call_soon_threadsafe(changes.put_nowait, event)
+
+    events.subscribe(forward)
+
+    async def generate_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        changes.get(), timeout=KEEP_ALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield SSE_KEEP_ALIVE_FRAME
+                    continue
+                yield encode_sse_frame(change_event_to_response(event))
+        finally:
+            events.unsubscribe(forward)
+
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
+    )
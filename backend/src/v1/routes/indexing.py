@@ -0,0 +1,17 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+
+from src.logic.search.indexer import indexing_service
+from src.v1.schema import IndexStatusResponse, index_status_to_response
+
+router = APIRouter(prefix="/index", tags=["index"])
+
+
+@router.get("", response_model=List[IndexStatusResponse])
+async def get_index_statuses():
+    try:
+        statuses = indexing_service.get_statuses()
+        return [index_status_to_response(status) for status in statuses]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
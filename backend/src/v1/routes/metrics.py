@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+from src.logic import metrics
+from src.logic.ai_tutor.providers import get_provider_health_snapshot
+from src.v1.schema import MetricsResponse
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_model=MetricsResponse)
+async def get_metrics():
+    return MetricsResponse(
+        counters=metrics.get_metrics_snapshot(),
+        providers=get_provider_health_snapshot(),
+    )
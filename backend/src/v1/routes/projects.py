@@ -1,29 +1,72 @@
-from typing import List
+import asyncio
+import io
+import traceback
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from src.logic import projects_manager
+from src.logic.note_import import (
+    ChunkStreamReader,
+    get_archive_format,
+    run_import,
+)
+from src.logic.search.trigram import typeahead_service
+from src.logic.storage_io import run_storage_io
 from src.v1.schema import (
     CreateFileRequest,
     CreateProjectRequest,
     FileContentResponse,
+    ImportResultResponse,
     ProjectResponse,
     RenameFileRequest,
     RenameProjectRequest,
     SaveFileRequest,
     SuccessResponse,
+    TypeaheadHitResponse,
     file_content_to_response,
+    import_result_to_response,
     project_to_response,
+    typeahead_hit_to_response,
 )
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+MAX_PAGE_SIZE = 1000
+MAX_TYPEAHEAD_RESULTS = 50
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def set_page_headers(response: Response, next_cursor: Optional[str], total: int):
+    # Page metadata goes in headers so the list bodies keep their shape
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
 
 @router.get("", response_model=List[ProjectResponse])
-async def get_all_projects():
+async def get_all_projects(
+    response: Response,
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    include_files: bool = True,
+    count_only: bool = False,
+):
     try:
-        projects = projects_manager.get_all_projects()
+        if count_only:
+            total = await run_storage_io(projects_manager.count_projects, prefix)
+            set_page_headers(response, None, total)
+            return []
+
+        projects, next_cursor, total = await run_storage_io(
+            projects_manager.list_projects, prefix, cursor, limit, include_files
+        )
+        set_page_headers(response, next_cursor, total)
         return [project_to_response(project) for project in projects]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -31,7 +74,7 @@ async def get_all_projects():
 @router.post("", response_model=ProjectResponse)
 async def create_project(request: CreateProjectRequest):
     try:
-        project = projects_manager.create_project(request.name)
+        project = await run_storage_io(projects_manager.create_project, request.name)
         return project_to_response(project)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -40,7 +83,7 @@ async def create_project(request: CreateProjectRequest):
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_single_project(project_id: str):
     try:
-        project = projects_manager.get_single_project(project_id)
+        project = await run_storage_io(projects_manager.get_single_project, project_id)
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         return project_to_response(project)
@@ -51,7 +94,9 @@ async def get_single_project(project_id: str):
 @router.put("/{project_id}/rename", response_model=ProjectResponse)
 async def rename_project(project_id: str, request: RenameProjectRequest):
     try:
-        project = projects_manager.rename_project(project_id, request.new_name)
+        project = await run_storage_io(
+            projects_manager.rename_project, project_id, request.new_name
+        )
         return project_to_response(project)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -60,16 +105,57 @@ async def rename_project(project_id: str, request: RenameProjectRequest):
 @router.delete("/{project_id}", response_model=SuccessResponse)
 async def delete_project(project_id: str):
     try:
-        success = projects_manager.delete_project(project_id)
+        success = await run_storage_io(projects_manager.delete_project, project_id)
         return SuccessResponse(success=success)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/{project_id}/files", response_model=List[str])
+async def get_file_names(
+    project_id: str,
+    response: Response,
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    count_only: bool = False,
+):
+    try:
+        if count_only:
+            total = await run_storage_io(
+                projects_manager.count_project_file_names, project_id, prefix
+            )
+            set_page_headers(response, None, total)
+            return []
+
+        file_names, next_cursor, total = await run_storage_io(
+            projects_manager.list_project_file_names, project_id, prefix, cursor, limit
+        )
+        set_page_headers(response, next_cursor, total)
+        return file_names
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{project_id}/search", response_model=List[TypeaheadHitResponse])
+async def search_notes(
+    project_id: str,
+    q: str = "",
+    limit: int = Query(default=10, ge=1, le=MAX_TYPEAHEAD_RESULTS),
+):
+    try:
+        hits = await run_storage_io(typeahead_service.search, project_id, q, limit)
+        return [typeahead_hit_to_response(hit) for hit in hits]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/{project_id}/files", response_model=FileContentResponse)
 async def create_file(project_id: str, request: CreateFileRequest):
     try:
-        file_content = projects_manager.create_file(project_id, request.file_name)
+        file_content = await run_storage_io(
+            projects_manager.create_file, project_id, request.file_name
+        )
         return file_content_to_response(file_content)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -78,7 +164,9 @@ async def create_file(project_id: str, request: CreateFileRequest):
 @router.get("/{project_id}/files/{file_id}", response_model=FileContentResponse)
 async def open_file(project_id: str, file_id: str):
     try:
-        content = projects_manager.open_file_by_id(project_id, file_id)
+        content = await run_storage_io(
+            projects_manager.open_file_by_id, project_id, file_id
+        )
         return file_content_to_response(content)
     except (FileNotFoundError, ValueError) as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -87,7 +175,9 @@ async def open_file(project_id: str, file_id: str):
 @router.post("/{project_id}/files/{file_id}", response_model=SuccessResponse)
 async def save_file(project_id: str, file_id: str, request: SaveFileRequest):
     try:
-        success = projects_manager.save_file_by_id(project_id, file_id, request.content)
+        success = await run_storage_io(
+            projects_manager.save_file_by_id, project_id, file_id, request.content
+        )
         return SuccessResponse(success=success)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -96,8 +186,8 @@ async def save_file(project_id: str, file_id: str, request: SaveFileRequest):
 @router.put("/{project_id}/files/{file_id}/rename", response_model=FileContentResponse)
 async def rename_file(project_id: str, file_id: str, request: RenameFileRequest):
     try:
-        file_content = projects_manager.rename_file(
-            project_id, file_id, request.new_name
+        file_content = await run_storage_io(
+            projects_manager.rename_file, project_id, file_id, request.new_name
         )
         return file_content_to_response(file_content)
     except (FileNotFoundError, ValueError) as e:
@@ -107,7 +197,52 @@ async def rename_file(project_id: str, file_id: str, request: RenameFileRequest)
 @router.delete("/{project_id}/files/{file_id}", response_model=SuccessResponse)
 async def delete_file(project_id: str, file_id: str):
     try:
-        success = projects_manager.delete_file(project_id, file_id)
+        success = await run_storage_io(
+            projects_manager.delete_file, project_id, file_id
+        )
         return SuccessResponse(success=success)
     except (FileNotFoundError, ValueError) as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{project_id}/import", response_model=ImportResultResponse)
+async def import_notes(project_id: str, request: Request, overwrite: bool = False):
+    archive_format = get_archive_format(request.headers.get("content-type", ""))
+    if archive_format is None:
+        raise HTTPException(
+            status_code=415, detail="Send the archive as application/zip or x-tar"
+        )
+    try:
+        await run_storage_io(projects_manager.get_single_project, project_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The archive is unpacked on its own thread while the body is still
+    # arriving; only a bounded number of chunks is held in between
+    reader = ChunkStreamReader()
+    import_task = asyncio.ensure_future(
+        run_import(project_id, io.BufferedReader(reader), archive_format, overwrite)
+    )
+    import_task.add_done_callback(lambda _: reader.abandon())
+
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await reader.feed(chunk)
+    except BaseException:
+        # The upload broke off. The import stops at the cut, keeping the notes
+        # written so far, and is awaited so its outcome isn't lost.
+        await reader.finish()
+        try:
+            result = await import_task
+            print(f"Import into {project_id} cut short: {result}")
+        except Exception:
+            print(traceback.format_exc())
+        raise
+    await reader.finish()
+
+    try:
+        result = await import_task
+        return import_result_to_response(result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
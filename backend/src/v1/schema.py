@@ -3,7 +3,15 @@ from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
-from src.models import BaseFolderConfig, FileContent, Project
+from src.models import (
+    BaseFolderConfig,
+    ChangeEvent,
+    FileContent,
+    ImportResult,
+    IndexStatus,
+    Project,
+    TypeaheadHit,
+)
 
 # ================================
 # REQUEST SCHEMAS
@@ -41,6 +49,8 @@ class AITutorChatRequest(BaseModel):
     conversation_history: List[Dict[str, Any]] = Field(default_factory=list)
     highlighted_text: Optional[str] = None
     hitl_input: Optional[Dict[str, Any]] = Field(default_factory=dict)
+    search_scope: str = "project"  # "project", "workspace"
+    search_project_ids: List[str] = Field(default_factory=list)
 
 
 class RenameFileRequest(BaseModel):
@@ -61,6 +71,7 @@ class ProjectResponse(BaseModel):
     name: str
     path: str
     file_names: List[str]
+    file_count: int = 0
     created: datetime
     modified: datetime
 
@@ -94,12 +105,52 @@ class SuccessResponse(BaseModel):
 
 
 class AITutorStreamMessage(BaseModel):
-    type: str  # "step", "final", "note"
+    type: str  # "step", "final", "note_patch", "consent"
     content: str
     timestamp: datetime = Field(default_factory=datetime.now)
     thread_id: str
 
 
+class IndexStatusResponse(BaseModel):
+    project_id: str
+    state: str  # "pending", "indexing", "ready", "stale", "error"
+    indexed_files: int
+    total_files: int
+    updated: Optional[datetime] = None
+
+
+class ChangeEventResponse(BaseModel):
+    type: (
+        str  # "file_saved", "file_created", "file_deleted", "file_renamed", "project_*"
+    )
+    project_id: str
+    path: Optional[str] = None
+    old_path: Optional[str] = None
+    source: str  # "app", "watcher"
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
+class ImportResultResponse(BaseModel):
+    project_id: str
+    imported: int
+    skipped: int
+    failed: int
+    errors: List[str]
+
+
+class TypeaheadHitResponse(BaseModel):
+    file: str
+    match: str
+    score: float
+    snippet: str
+    highlights: List[List[int]]
+
+
+class MetricsResponse(BaseModel):
+    counters: Dict[str, Dict[str, float]]
+    providers: Dict[str, Dict[str, Any]]
+
+
 # ================================
 # MODEL TO SCHEMA CONVERTERS
 # ================================
@@ -111,6 +162,7 @@ def project_to_response(project: Project) -> ProjectResponse:
         name=project.name,
         path=project.path,
         file_names=project.file_names,
+        file_count=project.file_count,
         created=project.created,
         modified=project.modified,
     )
@@ -134,3 +186,43 @@ def file_content_to_response(file_content: FileContent) -> FileContentResponse:
         modified=file_content.modified,
         size=file_content.size,
     )
+
+
+def index_status_to_response(status: IndexStatus) -> IndexStatusResponse:
+    return IndexStatusResponse(
+        project_id=status.project_id,
+        state=status.state,
+        indexed_files=status.indexed_files,
+        total_files=status.total_files,
+        updated=status.updated,
+    )
+
+
+def import_result_to_response(result: ImportResult) -> ImportResultResponse:
+    return ImportResultResponse(
+        project_id=result.project_id,
+        imported=result.imported,
+        skipped=result.skipped,
+        failed=result.failed,
+        errors=result.errors,
+    )
+
+
+def change_event_to_response(event: ChangeEvent) -> ChangeEventResponse:
+    return ChangeEventResponse(
+        type=event.type,
+        project_id=event.project_id,
+        path=event.path,
+        old_path=event.old_path,
+        source=event.source,
+    )
+
+
+def typeahead_hit_to_response(hit: TypeaheadHit) -> TypeaheadHitResponse:
+    return TypeaheadHitResponse(
+        file=hit.file,
+        match=hit.match,
+        score=hit.score,
+        snippet=hit.snippet,
+        highlights=hit.highlights,
+    )
@@ -22,6 +22,8 @@ export default function AIAssistant({
   textEditorRef,
 }: AIAssistantProps) {
   const [messages, setMessages] = useState<Message[]>([]);
+  // One thread per conversation, so follow-ups can reuse the last turn's notes
+  const [threadId] = useState(() => crypto.randomUUID());
   const [isThinking, setIsThinking] = useState(false);
   const [pendingConsent, setPendingConsent] = useState<{
     message: string;
@@ -29,10 +31,11 @@ export default function AIAssistant({
   } | null>(null);
   const [isProcessingConsent, setIsProcessingConsent] = useState(false);
 
-  const appendToFile = (content: string) => {
+  const reloadEditedFile = () => {
     if (!textEditorRef.current) return;
 
-    textEditorRef.current.appendContent(content);
+    // The note was edited server-side; only the small patch ack is streamed
+    textEditorRef.current.reloadFile();
   };
 
   const handleConsentResponse = async (decision: "approve" | "reject") => {
@@ -86,8 +89,8 @@ export default function AIAssistant({
                 try {
                   const data = JSON.parse(line.slice(6));
 
-                  if (data.type === "note") {
-                    appendToFile(data.content);
+                  if (data.type === "note_patch") {
+                    reloadEditedFile();
                   } else if (data.type === "consent") {
                     // Handle consent request - add to message list and set pending state
                     const consentMessage: Message = {
@@ -191,6 +194,7 @@ export default function AIAssistant({
           body: JSON.stringify({
             message: inputText,
             project_id: activeProjectId,
+            thread_id: threadId,
             conversation_history: conversationHistory,
             highlighted_text: selectedText.trim() || null,
           }),
@@ -222,9 +226,9 @@ export default function AIAssistant({
                 try {
                   const data = JSON.parse(line.slice(6));
 
-                  if (data.type === "note") {
-                    // Handle note content by appending to active file
-                    appendToFile(data.content);
+                  if (data.type === "note_patch") {
+                    // Handle server-side note edit by reloading the active file
+                    reloadEditedFile();
                   } else if (data.type === "consent") {
                     // Handle consent request - add to message list and set pending state
                     const consentMessage: Message = {
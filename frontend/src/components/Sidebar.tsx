@@ -6,8 +6,15 @@ import ProjectList from "./sidebar/ProjectList";
 import FileList from "./sidebar/FileList";
 import Button from "./ui/Button";
 import LoadingSpinner from "./ui/LoadingSpinner";
-import { Project } from "../types";
-import { apiGet, apiPost, apiPut, apiDelete, ApiError } from "../utils/api";
+import { ChangeEvent, Project } from "../types";
+import {
+  API_BASE,
+  apiGet,
+  apiPost,
+  apiPut,
+  apiDelete,
+  ApiError,
+} from "../utils/api";
 
 interface SidebarProps {
   collapsed: boolean;
@@ -67,6 +74,22 @@ export default function Sidebar({
     }
   }, [initialized]);
 
+  useEffect(() => {
+    // Pick up notes edited outside the app instead of re-polling listings
+    const eventSource = new EventSource(`${API_BASE}/events`);
+    eventSource.onmessage = (message) => {
+      const event: ChangeEvent = JSON.parse(message.data);
+      if (event.source !== "watcher") return;
+
+      if (event.type.startsWith("project_")) {
+        loadProjects();
+      } else {
+        refreshProject(event.project_id);
+      }
+    };
+    return () => eventSource.close();
+  }, []);
+
   const loadProjects = async () => {
     try {
       const projectsData = await apiGet<Project[]>("/projects");
@@ -76,6 +99,17 @@ export default function Sidebar({
     }
   };
 
+  const refreshProject = async (projectId: string) => {
+    try {
+      const project = await apiGet<Project>(`/projects/${projectId}`);
+      setProjects((prev) =>
+        prev.map((p) => (p.id === projectId ? project : p)),
+      );
+    } catch (err) {
+      console.error("Error refreshing project:", err);
+    }
+  };
+
   const loadProjectContents = async (projectId: string) => {
     try {
       const project = await apiGet<Project>(`/projects/${projectId}`);
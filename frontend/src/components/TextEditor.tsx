@@ -20,6 +20,7 @@ const WELCOME_CONTENT =
 export interface TextEditorRef {
   appendContent: (content: string) => void;
   insertAtCursor: (content: string) => void;
+  reloadFile: () => void;
 }
 
 interface TextEditorProps {
@@ -38,6 +39,8 @@ export default function TextEditor({
   const [activeFile, setActiveFile] = useState<File | null>(null);
   const [hasUnsavedChanges, setHasUnsavedChanges] = useState(false);
   const [isAutoSaving, setIsAutoSaving] = useState(false);
+  // The note changed on the server while the editor held unsaved edits
+  const [hasRemoteChanges, setHasRemoteChanges] = useState(false);
 
   const editor = useEditor({
     extensions: [Selection, StarterKit],
@@ -64,6 +67,29 @@ export default function TextEditor({
     immediatelyRender: false,
   });
 
+  const fetchFileData = useCallback(async () => {
+    if (!activeProjectId || !activeFileName) {
+      setActiveFile(null);
+      return;
+    }
+
+    try {
+      const response = await fetch(
+        `http://localhost:8000/api/v1/projects/${activeProjectId}/files/${activeFileName}`,
+      );
+      if (response.ok) {
+        const fileData = await response.json();
+        setActiveFile(fileData);
+      } else {
+        console.error("Failed to fetch file data:", response.statusText);
+        setActiveFile(null);
+      }
+    } catch (err) {
+      console.error("Error fetching file data:", err);
+      setActiveFile(null);
+    }
+  }, [activeProjectId, activeFileName]);
+
   useImperativeHandle(ref, () => {
     return {
       appendContent(content: string) {
@@ -84,35 +110,21 @@ export default function TextEditor({
         const htmlContent = marked(content);
         editor.commands.insertContent(htmlContent);
       },
-    };
-  }, [editor]);
-
-  useEffect(() => {
-    const fetchFileData = async () => {
-      if (!activeProjectId || !activeFileName) {
-        setActiveFile(null);
-        return;
-      }
 
-      try {
-        const response = await fetch(
-          `http://localhost:8000/api/v1/projects/${activeProjectId}/files/${activeFileName}`,
-        );
-        if (response.ok) {
-          const fileData = await response.json();
-          setActiveFile(fileData);
-        } else {
-          console.error("Failed to fetch file data:", response.statusText);
-          setActiveFile(null);
+      reloadFile() {
+        if (hasUnsavedChanges) {
+          // Reloading would throw away the user's typing; let them choose
+          setHasRemoteChanges(true);
+          return;
         }
-      } catch (err) {
-        console.error("Error fetching file data:", err);
-        setActiveFile(null);
-      }
+        fetchFileData();
+      },
     };
+  }, [editor, fetchFileData, hasUnsavedChanges]);
 
+  useEffect(() => {
     fetchFileData();
-  }, [activeProjectId, activeFileName]);
+  }, [fetchFileData]);
 
   // Update editor content when activeFile changes
   useEffect(() => {
@@ -125,12 +137,22 @@ export default function TextEditor({
         editor.commands.setContent(WELCOME_CONTENT);
         setHasUnsavedChanges(false);
       }
+      setHasRemoteChanges(false);
     }
   }, [activeFile, editor]);
 
   const handleSave = useCallback(
     async (isAutoSave = false) => {
       if (!editor || !activeProjectId || !activeFileName) return;
+      if (
+        hasRemoteChanges &&
+        (isAutoSave ||
+          !confirm(
+            "This note was edited by the assistant. Overwrite those edits with your version?",
+          ))
+      ) {
+        return;
+      }
 
       try {
         if (isAutoSave) {
@@ -157,6 +179,7 @@ export default function TextEditor({
 
         if (response.ok) {
           setHasUnsavedChanges(false);
+          setHasRemoteChanges(false);
         } else {
           const errorText = await response.text();
           if (!isAutoSave) {
@@ -174,19 +197,29 @@ export default function TextEditor({
         }
       }
     },
-    [editor, activeProjectId, activeFileName],
+    [editor, activeProjectId, activeFileName, hasRemoteChanges],
   );
 
+  const handleReload = useCallback(() => {
+    if (
+      hasUnsavedChanges &&
+      !confirm("Reload the note and discard your unsaved changes?")
+    ) {
+      return;
+    }
+    fetchFileData();
+  }, [hasUnsavedChanges, fetchFileData]);
+
   // Auto-save timer
   useEffect(() => {
     const autoSaveInterval = setInterval(() => {
-      if (hasUnsavedChanges && !isAutoSaving) {
+      if (hasUnsavedChanges && !hasRemoteChanges && !isAutoSaving) {
         handleSave(true);
       }
     }, AUTO_SAVE_INTERVAL_MS);
 
     return () => clearInterval(autoSaveInterval);
-  }, [hasUnsavedChanges, isAutoSaving, handleSave]);
+  }, [hasUnsavedChanges, hasRemoteChanges, isAutoSaving, handleSave]);
 
   // Keyboard shortcut for saving
   useEffect(() => {
@@ -216,13 +249,23 @@ export default function TextEditor({
                 •{" "}
                 {isAutoSaving
                   ? "Auto-saving..."
-                  : hasUnsavedChanges
+                  : hasRemoteChanges
+                    ? "Edited elsewhere, auto-save paused"
+                    : hasUnsavedChanges
                     ? "Unsaved changes"
                     : "Saved"}
               </span>
             )}
           </div>
           <div className="flex items-center space-x-2">
+            {hasRemoteChanges && (
+              <button
+                onClick={handleReload}
+                className="px-3 py-1 text-xs rounded bg-amber-500 text-white hover:bg-amber-600"
+              >
+                Reload note
+              </button>
+            )}
             <button
               onClick={() => handleSave()}
               disabled={!activeFileName || !hasUnsavedChanges}
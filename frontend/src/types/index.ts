@@ -30,3 +30,12 @@ export interface Message {
   timestamp: Date;
   thread_id?: string;
 }
+
+export interface ChangeEvent {
+  type: string;
+  project_id: string;
+  path: string | null;
+  old_path: string | null;
+  source: "app" | "watcher";
+  timestamp: string;
+}